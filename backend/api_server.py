@@ -3,7 +3,7 @@ from flask_cors import CORS
 import os
 import googlemaps
 from dotenv import load_dotenv
-import polyline
+from app.services.geometry import decode_polyline, sample_points_for_search
 
 # 環境変数読み込み
 load_dotenv()
@@ -11,6 +11,8 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)
 
+SEARCH_RADIUS = 3000  # 3km radius
+
 # Google Maps クライアント初期化
 GOOGLE_MAPS_API_KEY = os.getenv('GOOGLE_MAPS_API_KEY')
 gmaps = None
@@ -107,11 +109,10 @@ def get_historical_spots_along_route(route_polyline):
     
     try:
         # ポリラインをデコードして座標を取得
-        route_coords = polyline.decode(route_polyline)
+        route_coords = decode_polyline(route_polyline)
         
-        # ルート上のサンプリングポイントを取得
-        sample_interval = max(1, len(route_coords) // 5)
-        sample_points = route_coords[::sample_interval][:5]
+        # ルート上のサンプリングポイントを取得（道のり一定間隔、検索円が重なる程度）
+        sample_points = sample_points_for_search(route_coords, SEARCH_RADIUS, max_points=5)
         
         historical_spots = []
         spot_ids = set()
@@ -124,7 +125,7 @@ def get_historical_spots_along_route(route_polyline):
             # Places APIで近くの歴史スポットを検索
             places_result = gmaps.places_nearby(
                 location=(point[0], point[1]),
-                radius=3000,  # 3km radius
+                radius=SEARCH_RADIUS,
                 keyword=keyword,
                 language='ja'
             )
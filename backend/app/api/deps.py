@@ -1,5 +1,5 @@
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,13 +8,20 @@ from app.core.config import settings
 from app.db.database import get_db
 from app.models.user import User
 from app.schemas.user import TokenData
+from app.services.principal_cache import principal_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 async def get_current_user(
+    request: Request,
     db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ) -> User:
+    # 同じリクエスト内では1回だけ解決する
+    memoized = getattr(request.state, "current_user", None)
+    if memoized is not None:
+        return memoized
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -27,14 +34,21 @@ async def get_current_user(
         if username is None:
             raise credentials_exception
         token_data = TokenData(username=username)
+        issued_at = payload.get("iat")
     except JWTError:
         raise credentials_exception
     
-    result = await db.execute(select(User).where(User.username == token_data.username))
-    user = result.scalar_one_or_none()
-    
+    user = await principal_cache.get(db, token_data.username, issued_at)
     if user is None:
-        raise credentials_exception
+        generation = principal_cache.generation(token_data.username)
+        result = await db.execute(select(User).where(User.username == token_data.username))
+        user = result.scalar_one_or_none()
+        
+        if user is None:
+            raise credentials_exception
+        principal_cache.set(token_data.username, issued_at, user, generation)
+    
+    request.state.current_user = user
     return user
 
 async def get_current_active_user(
@@ -4,10 +4,11 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.core.config import settings
-from app.core.security import create_access_token, verify_password, get_password_hash
+from app.core.security import create_access_token, password_hasher
 from app.db.database import get_db
 from app.models.user import User
 from app.schemas.user import Token, UserCreate, UserResponse
+from app.services.leaderboard import leaderboard
 
 router = APIRouter()
 
@@ -33,11 +34,12 @@ async def register(
         username=user_data.username,
         email=user_data.email,
         full_name=user_data.full_name,
-        hashed_password=get_password_hash(user_data.password)
+        hashed_password=await password_hasher.hash(user_data.password)
     )
     db.add(db_user)
     await db.commit()
     await db.refresh(db_user)
+    leaderboard.record(db_user.id, db_user.total_score)
     
     return db_user
 
@@ -50,13 +52,21 @@ async def login(
     result = await db.execute(select(User).where(User.username == form_data.username))
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    verified = False
+    if user:
+        verified, new_hash = await password_hasher.verify_and_update(form_data.password, user.hashed_password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # BCRYPT_ROUNDS が変わっていれば、照合できた平文で新しいコストのハッシュに置き換える
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    
     # Create token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
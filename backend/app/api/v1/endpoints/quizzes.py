@@ -1,15 +1,28 @@
-from typing import List, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from app.api.deps import get_current_active_user
+from app.core.pagination import (
+    NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, newest_first, reject_skip_with_cursor
+)
+from app.db.bulk import insert_ignore_conflicts
 from app.db.database import get_db
 from app.models.user import User
 from app.models.quiz import Quiz, QuizAttempt
-from app.schemas.quiz import QuizCreate, QuizResponse, QuizAttemptCreate, QuizAttemptResponse
+from app.schemas.quiz import (
+    QuizCreate, QuizResponse, QuizAttemptCreate, QuizAttemptResponse,
+    QuizAttemptBatch, QuizAttemptBatchResponse
+)
 from app.services.quiz import quiz_service
 from app.services.openai_service import openai_service
+from app.services.quiz_pipeline import quiz_pipeline, stored_quiz_dict
+from app.services.principal_cache import principal_cache
+from app.services.leaderboard import leaderboard
 
 router = APIRouter()
 
@@ -27,12 +40,24 @@ async def generate_quiz(
 async def generate_ai_quiz(
     spot_name: str,
     spot_description: str,
-    difficulty: str = "中学生"
+    difficulty: str = "中学生",
+    spot_id: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     OpenAI APIを使用した動的クイズ生成
     認証不要でフロントエンドから直接呼び出し可能
+    spot_id を渡すと、事前生成済みのクイズがあればそれを即座に返す
     """
+    if spot_id:
+        stored_quiz = await quiz_pipeline.get_stored_quiz(db, spot_id, difficulty)
+        if stored_quiz:
+            return {
+                "success": True,
+                "quiz": stored_quiz_dict(stored_quiz),
+                "generated_by": "pregenerated"
+            }
+    
     # OpenAI APIでクイズ生成を試行
     quiz_data = await openai_service.generate_quiz(
         spot_name=spot_name,
@@ -53,6 +78,72 @@ async def generate_ai_quiz(
         "generated_by": "openai" if quiz_data and quiz_data.get("question") else "fallback"
     }
 
+@router.post("/generate-ai/stream")
+async def stream_ai_quiz(
+    spot_name: str,
+    spot_description: str,
+    difficulty: str = "中学生",
+    spot_id: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    OpenAI APIのクイズ生成をSSEで逐次返す
+    question / option / answer / explanation イベントを行が確定するたびに送り、
+    最後の quiz イベントで確定版のクイズを送る（事前生成済み・フォールバック時は quiz のみ）
+    途中まで送ってから生成に失敗したときは、reset イベントで表示済みの内容を破棄させてからフォールバックの quiz を送る
+    """
+    stored_quiz = None
+    if spot_id:
+        stored_quiz = await quiz_pipeline.get_stored_quiz(db, spot_id, difficulty)
+    
+    async def events():
+        if stored_quiz:
+            yield _sse("quiz", {"quiz": stored_quiz_dict(stored_quiz), "generated_by": "pregenerated"})
+            return
+        
+        quiz_data = None
+        partial_sent = False
+        async for event in openai_service.stream_quiz(spot_name, spot_description, difficulty):
+            if event["type"] == "quiz":
+                quiz_data = event["quiz"]
+            else:
+                partial_sent = True
+                yield _sse(event.pop("type"), event)
+        
+        generated_by = "openai"
+        if not quiz_data:
+            if partial_sent:
+                yield _sse("reset", {"reason": "generation_failed"})
+            quiz_data = await quiz_service.generate_quiz({
+                "name": spot_name,
+                "description": spot_description
+            }, difficulty)
+            generated_by = "fallback"
+        yield _sse("quiz", {"quiz": quiz_data, "generated_by": generated_by})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.get("/pipeline/stats", response_model=Dict[str, Any])
+async def get_pipeline_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """クイズ事前生成パイプラインのキュー状況（運用監視用）"""
+    return quiz_pipeline.stats()
+
+@router.get("/usage-stats", response_model=Dict[str, Any])
+async def get_usage_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """OpenAI API使用状況と応答キャッシュのヒット率・節約トークン数（コスト管理用）"""
+    return await openai_service.get_usage_stats()
+
 @router.post("/save", response_model=QuizResponse)
 async def save_quiz(
     quiz_data: QuizCreate,
@@ -112,30 +203,134 @@ async def submit_quiz_attempt(
     )
     db.add(db_attempt)
     
-    # Update user's total score
+    # Update user's total score（同時回答でも取りこぼさないよう、SQL側で加算する）
+    total_score = current_user.total_score
     if is_correct:
-        current_user.total_score += points_earned
+        total_score = await db.scalar(
+            update(User)
+            .where(User.id == current_user.id)
+            .values(total_score=User.total_score + points_earned)
+            .returning(User.total_score)
+            .execution_options(synchronize_session=False)
+        )
+        set_committed_value(current_user, 'total_score', total_score)
     
     await db.commit()
+    if is_correct:
+        principal_cache.invalidate(current_user.username)
+        leaderboard.record(current_user.id, total_score, points_earned)
     await db.refresh(db_attempt)
     
     return db_attempt
 
+@router.post("/attempts/batch", response_model=QuizAttemptBatchResponse)
+async def submit_quiz_attempts_batch(
+    batch: QuizAttemptBatch,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    複数の回答をまとめて保存する（オフライン中に貯めた回答の同期用）
+    client_attempt_id が保存済みの回答は duplicate として保存済みの内容を返すので、再送しても二重に加点されない。
+    クイズの確認・回答の挿入・スコアの加算はそれぞれ1文で、全体を1トランザクションで行う
+    """
+    quiz_ids = {item.quiz_id for item in batch.attempts}
+    result = await db.execute(
+        select(Quiz.id, Quiz.correct_answer, Quiz.points).where(Quiz.id.in_(quiz_ids))
+    )
+    quizzes = {quiz_id: (correct_answer, points) for quiz_id, correct_answer, points in result.all()}
+    
+    rows = []
+    for item in batch.attempts:
+        if item.quiz_id not in quizzes:
+            continue
+        correct_answer, points = quizzes[item.quiz_id]
+        is_correct = item.selected_answer == correct_answer
+        rows.append({
+            'user_id': current_user.id,
+            'quiz_id': item.quiz_id,
+            'route_id': item.route_id,
+            'selected_answer': item.selected_answer,
+            'is_correct': is_correct,
+            'points_earned': points if is_correct else 0,
+            'client_attempt_id': item.client_attempt_id
+        })
+    
+    created = {
+        attempt.client_attempt_id: attempt
+        for attempt in await insert_ignore_conflicts(
+            db, QuizAttempt, rows, conflict_columns=['user_id', 'client_attempt_id']
+        )
+    }
+    existing = {}
+    missing = [row['client_attempt_id'] for row in rows if row['client_attempt_id'] not in created]
+    if missing:
+        result = await db.execute(
+            select(QuizAttempt).where(
+                QuizAttempt.user_id == current_user.id,
+                QuizAttempt.client_attempt_id.in_(missing)
+            )
+        )
+        existing = {attempt.client_attempt_id: attempt for attempt in result.scalars()}
+    
+    points_earned = sum(attempt.points_earned for attempt in created.values())
+    total_score = current_user.total_score
+    if points_earned:
+        total_score = await db.scalar(
+            update(User)
+            .where(User.id == current_user.id)
+            .values(total_score=User.total_score + points_earned)
+            .returning(User.total_score)
+            .execution_options(synchronize_session=False)
+        )
+        set_committed_value(current_user, 'total_score', total_score)
+    
+    await db.commit()
+    if points_earned:
+        principal_cache.invalidate(current_user.username)
+        leaderboard.record(current_user.id, total_score, points_earned)
+    
+    results = []
+    reported = set()
+    for item in batch.attempts:
+        key = item.client_attempt_id
+        if item.quiz_id not in quizzes:
+            results.append({'client_attempt_id': key, 'status': 'quiz_not_found', 'attempt': None})
+        elif key in created and key not in reported:
+            results.append({'client_attempt_id': key, 'status': 'created', 'attempt': created[key]})
+        else:
+            # 同じバッチ内で重複したキー、または以前の送信で保存済みのキー
+            attempt = created.get(key) or existing.get(key)
+            results.append({'client_attempt_id': key, 'status': 'duplicate', 'attempt': attempt})
+        reported.add(key)
+    
+    return {'results': results, 'points_earned': points_earned, 'total_score': total_score}
+
 @router.get("/history", response_model=List[QuizAttemptResponse])
 async def get_quiz_history(
-    skip: int = 0,
-    limit: int = 20,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    result = await db.execute(
-        select(QuizAttempt)
-        .where(QuizAttempt.user_id == current_user.id)
-        .order_by(QuizAttempt.attempted_at.desc())
-        .offset(skip)
-        .limit(limit)
+    """回答履歴（新しい順）。続きは X-Next-Cursor ヘッダーの値を cursor に渡して取る（skip は互換用で cursor とは併用不可）"""
+    reject_skip_with_cursor(cursor, skip)
+    after_id = decode_cursor(cursor, int)[0] if cursor else None
+    query = newest_first(
+        select(QuizAttempt).where(QuizAttempt.user_id == current_user.id),
+        QuizAttempt,
+        QuizAttempt.attempted_at,
+        after_id
     )
+    if not cursor:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit + 1))
     attempts = result.scalars().all()
+    if len(attempts) > limit:
+        attempts = attempts[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor((attempts[-1].id,))
     return attempts
 
 @router.get("/spot/{spot_id}", response_model=List[QuizResponse])
@@ -1,14 +1,32 @@
+import asyncio
+import json
+import logging
 from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from app.api.deps import get_current_active_user
-from app.db.database import get_db
+from app.core.pagination import (
+    NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, newest_first, reject_skip_with_cursor
+)
+from app.db.bulk import insert_ignore_conflicts
+from app.db.database import AsyncSessionLocal, get_db
 from app.models.user import User
-from app.models.route import Route, HistoricalSpot
+from app.models.route import Route, HistoricalSpot, RouteSpot
 from app.schemas.route import RouteSearch, RouteResponse, HistoricalSpotResponse
 from app.services.google_maps import google_maps_service
+from app.services.directions_cache import directions_cache
+from app.services.geometry import decode_polyline, order_along_polyline
+from app.services.geocode_cache import geocode_cache
+from app.services.spatial_index import spot_index, spot_to_dict
+from app.services.openai_service import openai_service
+from app.services.quiz import quiz_service
+from app.services.quiz_pipeline import DIFFICULTIES, quiz_pipeline, quiz_row, stored_quiz_dict
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -34,12 +52,103 @@ async def search_route(
         route_data['polyline'],
         num_points=5
     )
+    quiz_pipeline.enqueue_spots(historical_spots)
     
     return {
         'route': route_data,
         'historical_spots': historical_spots
     }
 
+@router.post("/search/stream")
+async def search_route_stream(
+    route_search: RouteSearch,
+    include_quizzes: bool = False,
+    difficulty: str = "中学生",
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    ルート検索のストリーミング版（NDJSON）
+    ルート情報を最初の1行で返し、歴史スポットは見つかった順に1行ずつ送る。
+    include_quizzes=true のときは各スポットのクイズも送る（保存済みがあればそれを使い、
+    なければその場で生成して保存する。事前生成パイプラインにはそれ以外の難易度だけを積む）
+    """
+    route_data = await google_maps_service.search_route(
+        route_search.origin,
+        route_search.destination
+    )
+    
+    if not route_data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Route not found"
+        )
+    
+    async def events():
+        yield _ndjson({'type': 'route', 'route': route_data})
+        
+        spot_count = 0
+        quiz_tasks = []
+        async for spot in google_maps_service.iter_historical_spots_along_route(
+            route_data['polyline'],
+            num_points=5
+        ):
+            spot_count += 1
+            yield _ndjson({'type': 'spot', 'spot': spot})
+            if include_quizzes:
+                quiz_pipeline.enqueue_spots([spot], [d for d in DIFFICULTIES if d != difficulty])
+                quiz_tasks.append(asyncio.create_task(_generate_spot_quiz(spot, difficulty)))
+            else:
+                quiz_pipeline.enqueue_spots([spot])
+        
+        try:
+            for next_quiz in asyncio.as_completed(quiz_tasks):
+                spot, quiz_data, generated_by = await next_quiz
+                yield _ndjson({
+                    'type': 'quiz',
+                    'spot_id': spot['place_id'],
+                    'quiz': quiz_data,
+                    'generated_by': generated_by
+                })
+        finally:
+            for task in quiz_tasks:
+                task.cancel()
+        
+        yield _ndjson({'type': 'done', 'spot_count': spot_count})
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+def _ndjson(event: Dict[str, Any]) -> str:
+    return json.dumps(event, ensure_ascii=False) + "\n"
+
+async def _generate_spot_quiz(spot: Dict[str, Any], difficulty: str):
+    """
+    保存済みのクイズを返し、なければ生成して保存する（並行して動くのでセッションはタスクごとに開く）
+    DB・API のエラーでもフォールバックのクイズを返す（1件の失敗でストリーム全体を止めない）
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            stored_quiz = await quiz_pipeline.get_stored_quiz(db, spot['place_id'], difficulty)
+            if stored_quiz:
+                return spot, stored_quiz_dict(stored_quiz), "pregenerated"
+            
+            quiz_data = await openai_service.generate_quiz(
+                spot_name=spot['name'],
+                spot_description=spot.get('description') or '',
+                difficulty=difficulty
+            )
+            if quiz_data:
+                # 同じスポットを同時にストリーミングした別のリクエストが保存済みなら挿入しない
+                await quiz_pipeline.store_quizzes(
+                    db, [quiz_row(spot['place_id'], spot['name'], difficulty, quiz_data)]
+                )
+                await db.commit()
+                return spot, quiz_data, "openai"
+    except Exception as e:
+        logger.error(f"Streaming quiz generation failed for {spot['place_id']}: {e}")
+    
+    quiz_data = await quiz_service.generate_quiz(spot, difficulty)
+    return spot, quiz_data, "fallback"
+
 @router.post("/save", response_model=RouteResponse)
 async def save_route(
     route_data: Dict,
@@ -62,58 +171,105 @@ async def save_route(
     db.add(db_route)
     await db.flush()
     
-    # Save historical spots
+    # Save historical spots: 未登録のスポットだけを1文でまとめて挿入し、
+    # 登録済みのもの（他のルートで保存済み）はそのまま共有する
+    unique_spots: Dict[str, Dict] = {}
     for spot_data in route_data.get('historical_spots', []):
-        # Check if spot already exists
-        result = await db.execute(
-            select(HistoricalSpot).where(HistoricalSpot.place_id == spot_data['place_id'])
+        unique_spots.setdefault(spot_data['place_id'], spot_data)
+    spots_data = list(unique_spots.values())
+    new_spots = await insert_ignore_conflicts(
+        db,
+        HistoricalSpot,
+        [
+            {
+                'place_id': spot_data['place_id'],
+                'name': spot_data['name'],
+                'address': spot_data.get('address'),
+                'lat': spot_data['lat'],
+                'lng': spot_data['lng'],
+                'description': spot_data.get('description'),
+                'types': spot_data.get('types', [])
+            }
+            for spot_data in spots_data
+        ],
+        conflict_columns=['place_id']
+    )
+    spots_by_place = {spot.place_id: spot for spot in new_spots}
+    existing_place_ids = [
+        spot_data['place_id'] for spot_data in spots_data
+        if spot_data['place_id'] not in spots_by_place
+    ]
+    if existing_place_ids:
+        existing = await db.scalars(
+            select(HistoricalSpot).where(HistoricalSpot.place_id.in_(existing_place_ids))
         )
-        existing_spot = result.scalar_one_or_none()
-        
-        if not existing_spot:
-            db_spot = HistoricalSpot(
-                route_id=db_route.id,
-                place_id=spot_data['place_id'],
-                name=spot_data['name'],
-                address=spot_data.get('address'),
-                lat=spot_data['lat'],
-                lng=spot_data['lng'],
-                description=spot_data.get('description'),
-                types=spot_data.get('types', [])
-            )
-            db.add(db_spot)
+        spots_by_place.update((spot.place_id, spot) for spot in existing)
+    spots = [spots_by_place[spot_data['place_id']] for spot_data in spots_data]
     
-    await db.commit()
-    await db.refresh(db_route)
+    # ルートとの対応をルート上の並び順つきでまとめて挿入
+    if spots:
+        positions, along = order_along_polyline(
+            [(spot.lat, spot.lng) for spot in spots],
+            decode_polyline(db_route.polyline or '')
+        )
+        await db.execute(insert(RouteSpot), [
+            {
+                'route_id': db_route.id,
+                'spot_id': spot.id,
+                'position': int(position),
+                'along_track_m': float(along_m)
+            }
+            for spot, position, along_m in zip(spots, positions, along)
+        ])
+        spots = [spot for _, spot in sorted(zip(positions, spots), key=lambda pair: pair[0])]
     
-    # Load relationships
-    result = await db.execute(
-        select(Route)
-        .where(Route.id == db_route.id)
-        .options(selectinload(Route.historical_spots))
-    )
-    db_route = result.scalar_one()
+    await db.commit()
+    spot_index.add_many(spot_to_dict(spot) for spot in new_spots)
     
+    # 保存したスポットをそのままレスポンスに使う（再SELECTしない）
+    set_committed_value(db_route, 'historical_spots', spots)
     return db_route
 
 @router.get("/history", response_model=List[RouteResponse])
 async def get_route_history(
-    skip: int = 0,
-    limit: int = 10,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    result = await db.execute(
+    """保存したルート（新しい順）。続きは X-Next-Cursor ヘッダーの値を cursor に渡して取る（skip は互換用で cursor とは併用不可）"""
+    reject_skip_with_cursor(cursor, skip)
+    after_id = decode_cursor(cursor, int)[0] if cursor else None
+    query = newest_first(
         select(Route)
         .where(Route.user_id == current_user.id)
-        .options(selectinload(Route.historical_spots))
-        .order_by(Route.created_at.desc())
-        .offset(skip)
-        .limit(limit)
+        .options(selectinload(Route.historical_spots)),
+        Route,
+        Route.created_at,
+        after_id
     )
+    if not cursor:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit + 1))
     routes = result.scalars().all()
+    if len(routes) > limit:
+        routes = routes[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor((routes[-1].id,))
     return routes
 
+@router.get("/cache/stats", response_model=Dict)
+async def get_cache_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """ジオコーディング・ルート検索キャッシュのヒット率など（運用監視用）"""
+    return {
+        'geocode': geocode_cache.stats(),
+        'directions': directions_cache.stats(),
+        'google_maps_single_flight': google_maps_service.flight.stats()
+    }
+
 @router.get("/{route_id}", response_model=RouteResponse)
 async def get_route(
     route_id: int,
@@ -1,12 +1,15 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
+from sqlalchemy import select
 from app.api.deps import get_current_active_user
 from app.db.database import get_db
 from app.models.user import User
-from app.schemas.user import UserResponse, UserUpdate
-from app.core.security import get_password_hash
+from app.schemas.user import LeaderboardEntry, RankResponse, UserResponse, UserUpdate
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, reject_skip_with_cursor
+from app.core.security import password_hasher
+from app.services.leaderboard import leaderboard
+from app.services.principal_cache import principal_cache
 
 router = APIRouter()
 
@@ -25,27 +28,92 @@ async def update_user_me(
     update_data = user_update.dict(exclude_unset=True)
     
     if "password" in update_data:
-        update_data["hashed_password"] = get_password_hash(update_data["password"])
+        update_data["hashed_password"] = await password_hasher.hash(update_data["password"])
         del update_data["password"]
     
+    previous_username = current_user.username
     for field, value in update_data.items():
         setattr(current_user, field, value)
     
     await db.commit()
+    principal_cache.invalidate(previous_username)
     await db.refresh(current_user)
     return current_user
 
+@router.get("/me/rank", response_model=RankResponse)
+async def read_my_rank(
+    period: str = Query("all", pattern="^(all|weekly|monthly)$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """自分の順位（period=all は合計スコア、weekly / monthly は期間内の獲得点）"""
+    if period == "all":
+        rank, total_users = await leaderboard.total_rank(db, current_user)
+        return RankResponse(period=period, rank=rank, score=current_user.total_score, total_users=total_users)
+    
+    standings = await leaderboard.period(db, period)
+    return RankResponse(
+        period=period,
+        rank=standings.rank(current_user.id),
+        score=standings.score(current_user.id) or 0,
+        total_users=len(standings)
+    )
+
 @router.get("/ranking", response_model=List[UserResponse])
 async def get_ranking(
-    skip: int = 0,
-    limit: int = 10,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(
-        select(User)
-        .order_by(desc(User.total_score))
-        .offset(skip)
-        .limit(limit)
-    )
-    users = result.scalars().all()
-    return users
\ No newline at end of file
+    """
+    合計スコアのランキング（スコア降順・同点はID順）
+    続きがあれば X-Next-Cursor ヘッダーの値を cursor に渡して次ページを取る（skip は互換用で cursor とは併用不可）
+    """
+    reject_skip_with_cursor(cursor, skip)
+    after = decode_cursor(cursor, int, int) if cursor else None
+    entries = await leaderboard.total_page(db, limit + 1, after, skip)
+    if len(entries) > limit:
+        last_user_id, last_score = entries[limit - 1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor((last_score, last_user_id))
+        entries = entries[:limit]
+    
+    users = await _users_by_id(db, [user_id for user_id, _ in entries])
+    return [users[user_id] for user_id, _ in entries if user_id in users]
+
+@router.get("/ranking/{period}", response_model=List[LeaderboardEntry])
+async def get_period_ranking(
+    response: Response,
+    period: str = Path(..., pattern="^(weekly|monthly)$"),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """週間（直近7日）・月間（直近30日）の獲得点ランキング。ページングは /ranking と同じ"""
+    standings = await leaderboard.period(db, period)
+    after = decode_cursor(cursor, int, int) if cursor else None
+    entries = standings.page(limit + 1, after)
+    if len(entries) > limit:
+        last_user_id, last_score = entries[limit - 1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor((last_score, last_user_id))
+        entries = entries[:limit]
+    
+    users = await _users_by_id(db, [user_id for user_id, _ in entries])
+    return [
+        LeaderboardEntry(
+            rank=standings.rank(user_id),
+            user_id=user_id,
+            username=users[user_id].username,
+            full_name=users[user_id].full_name,
+            score=score
+        )
+        for user_id, score in entries
+        if user_id in users
+    ]
+
+async def _users_by_id(db: AsyncSession, user_ids: List[int]) -> Dict[int, User]:
+    if not user_ids:
+        return {}
+    result = await db.execute(select(User).where(User.id.in_(user_ids)))
+    return {user.id: user for user in result.scalars()}
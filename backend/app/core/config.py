@@ -11,19 +11,101 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 1 week
+    # bcrypt のコスト（変更すると、次回ログイン時に新しいコストで再ハッシュされる）
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    # パスワードのハッシュ計算は専用スレッドプールで行う（待ちが上限を超えたら503で断る）
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+    PASSWORD_HASH_RETRY_AFTER: int = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", "1"))  # seconds
+    # 認証済みユーザーのキャッシュ（件数・有効期限秒、0で無効）。リクエストごとのユーザー検索を省く
+    AUTH_USER_CACHE_SIZE: int = int(os.getenv("AUTH_USER_CACHE_SIZE", "10000"))
+    AUTH_USER_CACHE_TTL: int = int(os.getenv("AUTH_USER_CACHE_TTL", "30"))
+    # ランキング（合計スコアをプロセス内の整列済み構造で持つか。複数ワーカー構成では false にしてDBの索引を使う）
+    LEADERBOARD_IN_MEMORY: bool = os.getenv("LEADERBOARD_IN_MEMORY", "true").lower() == "true"
+    # 週間・月間ランキングを回答履歴から集計し直す間隔秒（間の回答は差分で反映する）
+    LEADERBOARD_PERIOD_TTL: int = int(os.getenv("LEADERBOARD_PERIOD_TTL", "300"))
     
     DATABASE_URL: str = os.getenv(
         "DATABASE_URL",
         "sqlite+aiosqlite:///./famoly_drive.db"
     )
+    # コネクションプール（PostgreSQL。recycle はサーバー側で切られる前に張り直す秒数）
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30.0"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # SQLite の接続ごとのPRAGMA（WALで読み込みと書き込みを並行させ、ロック待ちはエラーにせず待つ）
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    # SQLログ（DB_ECHO は全文出力。通常は閾値を超えた遅いクエリだけを割合 SAMPLE_RATE で記録）
+    DB_ECHO: bool = os.getenv("DB_ECHO", "false").lower() == "true"
+    DB_SLOW_QUERY_MS: float = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+    DB_SLOW_QUERY_SAMPLE_RATE: float = float(os.getenv("DB_SLOW_QUERY_SAMPLE_RATE", "1.0"))
     
     GOOGLE_MAPS_API_KEY: str = os.getenv("GOOGLE_MAPS_API_KEY", "")
+    # googlemaps.Client は同期クライアントのため、専用スレッドプールで実行する
+    GOOGLE_MAPS_MAX_WORKERS: int = int(os.getenv("GOOGLE_MAPS_MAX_WORKERS", "16"))
+    # 同じ引数の同時API呼び出しを1回にまとめる際、共有する呼び出しのタイムアウト秒
+    GOOGLE_MAPS_FLIGHT_TIMEOUT: float = float(os.getenv("GOOGLE_MAPS_FLIGHT_TIMEOUT", "10.0"))
+    # ルート沿いのPlaces検索ファンアウト（同時実行数・1呼び出しあたりのタイムアウト秒）
+    PLACES_MAX_CONCURRENCY: int = int(os.getenv("PLACES_MAX_CONCURRENCY", "8"))
+    PLACES_CALL_TIMEOUT: float = float(os.getenv("PLACES_CALL_TIMEOUT", "5.0"))
+    PLACES_SEARCH_RADIUS: int = int(os.getenv("PLACES_SEARCH_RADIUS", "5000"))  # meters
+    # サンプル地点の周辺に保存済みスポットがこの件数以上あれば、Placesへの問い合わせを省略する
+    LOCAL_SPOTS_MIN_PER_POINT: int = int(os.getenv("LOCAL_SPOTS_MIN_PER_POINT", "2"))
+    # ジオコーディング結果キャッシュ（プロセス内LRUの件数・有効期限秒）
+    GEOCODE_CACHE_SIZE: int = int(os.getenv("GEOCODE_CACHE_SIZE", "1024"))
+    GEOCODE_CACHE_TTL: int = int(os.getenv("GEOCODE_CACHE_TTL", str(60 * 60 * 24 * 30)))  # 30 days
+    # ルート検索結果キャッシュ（メモリの有効期限秒・保存済みRouteを再利用できる最大経過秒、0で無効）
+    DIRECTIONS_CACHE_SIZE: int = int(os.getenv("DIRECTIONS_CACHE_SIZE", "512"))
+    DIRECTIONS_CACHE_TTL: int = int(os.getenv("DIRECTIONS_CACHE_TTL", str(60 * 60)))  # 1 hour
+    DIRECTIONS_DB_MAX_AGE: int = int(os.getenv("DIRECTIONS_DB_MAX_AGE", str(60 * 60 * 24 * 7)))  # 7 days
     
     # OpenAI 設定（コスト効率重視）
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
     OPENAI_MAX_TOKENS: int = int(os.getenv("OPENAI_MAX_TOKENS", "300"))
     OPENAI_TEMPERATURE: float = float(os.getenv("OPENAI_TEMPERATURE", "0.7"))
+    # クイズの出力形式（json: JSONで受け取り検証する / text: 従来の行形式）と、検証失敗時に出し直させる回数
+    OPENAI_QUIZ_OUTPUT_MODE: str = os.getenv("OPENAI_QUIZ_OUTPUT_MODE", "json")
+    OPENAI_QUIZ_MAX_REPAIRS: int = int(os.getenv("OPENAI_QUIZ_MAX_REPAIRS", "1"))
+    # 同じスポット・難易度の同時生成を1回にまとめる際、共有する呼び出しのタイムアウト秒
+    OPENAI_FLIGHT_TIMEOUT: float = float(os.getenv("OPENAI_FLIGHT_TIMEOUT", "30.0"))
+    # 複数スポットのクイズをまとめて生成する際の1回あたりの件数・max_tokens上限
+    OPENAI_BATCH_SIZE: int = int(os.getenv("OPENAI_BATCH_SIZE", "6"))
+    OPENAI_BATCH_MAX_TOKENS: int = int(os.getenv("OPENAI_BATCH_MAX_TOKENS", "2000"))
+    # LLM応答キャッシュ（有効期限秒・同一プロンプトで貯める応答の種類数・DBの最大件数・プロセス内LRUの件数）
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_TTL: int = int(os.getenv("LLM_CACHE_TTL", str(60 * 60 * 24 * 30)))  # 30 days
+    LLM_CACHE_VARIANTS: int = int(os.getenv("LLM_CACHE_VARIANTS", "1"))
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+    LLM_CACHE_MEMORY_SIZE: int = int(os.getenv("LLM_CACHE_MEMORY_SIZE", "512"))
+    # LLM呼び出しの計測（DBへの書き出し間隔秒・集計対象の期間秒）
+    LLM_TELEMETRY_FLUSH_INTERVAL: float = float(os.getenv("LLM_TELEMETRY_FLUSH_INTERVAL", "5.0"))
+    LLM_TELEMETRY_WINDOW: int = int(os.getenv("LLM_TELEMETRY_WINDOW", str(60 * 60 * 24 * 7)))  # 7 days
+    # 実測した出力トークン数から難易度ごとの max_tokens を自動で決める
+    # （p99 に余裕率を掛けた値を OPENAI_MIN_TOKENS〜OPENAI_MAX_TOKENS に収める。サンプル不足の間は OPENAI_MAX_TOKENS）
+    OPENAI_ADAPTIVE_MAX_TOKENS: bool = os.getenv("OPENAI_ADAPTIVE_MAX_TOKENS", "true").lower() == "true"
+    OPENAI_MIN_TOKENS: int = int(os.getenv("OPENAI_MIN_TOKENS", "120"))
+    OPENAI_TOKEN_BUDGET_MARGIN: float = float(os.getenv("OPENAI_TOKEN_BUDGET_MARGIN", "0.2"))
+    OPENAI_TOKEN_BUDGET_MIN_SAMPLES: int = int(os.getenv("OPENAI_TOKEN_BUDGET_MIN_SAMPLES", "20"))
+    # クイズ事前生成パイプライン（ワーカー数・キュー上限・リトライ回数・初回リトライ待ち秒）
+    QUIZ_PIPELINE_WORKERS: int = int(os.getenv("QUIZ_PIPELINE_WORKERS", "2"))
+    QUIZ_PIPELINE_MAX_QUEUE: int = int(os.getenv("QUIZ_PIPELINE_MAX_QUEUE", "500"))
+    QUIZ_PIPELINE_MAX_RETRIES: int = int(os.getenv("QUIZ_PIPELINE_MAX_RETRIES", "3"))
+    QUIZ_PIPELINE_RETRY_BACKOFF: float = float(os.getenv("QUIZ_PIPELINE_RETRY_BACKOFF", "2.0"))
+    
+    # 上流API（Google Maps / OpenAI）の切り替え。fake にすると記録済みフィクスチャを返す代替実装を使う（負荷試験用）
+    UPSTREAM_BACKEND: str = os.getenv("UPSTREAM_BACKEND", "real")
+    FAKE_UPSTREAM_FIXTURES: str = os.getenv("FAKE_UPSTREAM_FIXTURES", "")  # 空なら benchmarks/fixtures/upstreams.json
+    FAKE_MAPS_LATENCY_MS: float = float(os.getenv("FAKE_MAPS_LATENCY_MS", "80"))
+    FAKE_OPENAI_LATENCY_MS: float = float(os.getenv("FAKE_OPENAI_LATENCY_MS", "800"))
+    FAKE_UPSTREAM_JITTER: float = float(os.getenv("FAKE_UPSTREAM_JITTER", "0.3"))  # 対数正規分布のσ
+    FAKE_UPSTREAM_ERROR_RATE: float = float(os.getenv("FAKE_UPSTREAM_ERROR_RATE", "0.0"))
+    FAKE_UPSTREAM_SEED: Optional[int] = int(os.getenv("FAKE_UPSTREAM_SEED")) if os.getenv("FAKE_UPSTREAM_SEED") else None
     
     BACKEND_CORS_ORIGINS: List[str] = [
         "http://localhost:3000",
@@ -0,0 +1,53 @@
+import base64
+import json
+from typing import Any, Optional, Sequence, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.orm import aliased
+
+# 次ページのカーソルを返すレスポンスヘッダー（CORSでも公開する）
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """キーセットページングの位置（最後の行の並び替えキー）を不透明な文字列にする"""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, *types: type) -> Tuple[Any, ...]:
+    """encode_cursor の逆。値の個数と型が types と合わなければ400を返す"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        values = None
+    if (
+        not isinstance(values, list)
+        or len(values) != len(types)
+        or not all(isinstance(value, kind) for value, kind in zip(values, types))
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return tuple(values)
+
+def reject_skip_with_cursor(cursor: Optional[str], skip: int) -> None:
+    """skip（互換用のOFFSET）は cursor なしのときだけ使える。両方指定されたら400を返す"""
+    if cursor and skip:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="skip cannot be combined with cursor"
+        )
+
+def newest_first(query: Select, model: Any, timestamp: Any, after_id: Optional[int] = None) -> Select:
+    """
+    timestamp 降順（同時刻は id 降順）に並べ、after_id の行より後ろだけに絞る
+    基準行の時刻はサブクエリで取るので、保存形式の違い（SQLiteの文字列など）で比較がずれない。
+    (user_id, timestamp DESC, id DESC) の索引があれば、何ページ目でも索引の範囲検索1回で済む
+    """
+    query = query.order_by(timestamp.desc(), model.id.desc())
+    if after_id is not None:
+        anchor = aliased(model)
+        anchor_timestamp = select(getattr(anchor, timestamp.key)).where(anchor.id == after_id).scalar_subquery()
+        query = query.where(tuple_(timestamp, model.id) < tuple_(anchor_timestamp, after_id))
+    return query
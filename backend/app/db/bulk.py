@@ -0,0 +1,51 @@
+from typing import Any, Dict, List, Sequence, Type, TypeVar
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+ModelT = TypeVar("ModelT")
+
+async def insert_ignore_conflicts(
+    db: AsyncSession,
+    model: Type[ModelT],
+    rows: Sequence[Dict[str, Any]],
+    conflict_columns: Sequence[str]
+) -> List[ModelT]:
+    """
+    rows をまとめてINSERTし、conflict_columns（一意制約の列）が既存の行と重複するものは読み飛ばす
+    実際に挿入した行だけをORMオブジェクトで返す（クエリ数は件数によらず一定）
+    PostgreSQL / SQLite は INSERT ... ON CONFLICT DO NOTHING RETURNING の1文、
+    それ以外は IN による存在確認 + 一括INSERT の2文で行う
+    """
+    def key(row: Dict[str, Any]) -> tuple:
+        return tuple(row[column] for column in conflict_columns)
+
+    # 同じキーが複数あれば最初の1件だけを使う
+    unique: Dict[Any, Dict[str, Any]] = {}
+    for row in rows:
+        unique.setdefault(key(row), row)
+    unique_rows = list(unique.values())
+    if not unique_rows:
+        return []
+
+    dialect = db.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = (
+            dialect_insert(model)
+            .on_conflict_do_nothing(index_elements=list(conflict_columns))
+            .returning(model)
+        )
+        result = await db.scalars(stmt, unique_rows)
+        return list(result.all())
+
+    columns = [getattr(model, column) for column in conflict_columns]
+    result = await db.execute(
+        select(*columns).where(tuple_(*columns).in_([key(row) for row in unique_rows]))
+    )
+    existing = {tuple(row) for row in result.all()}
+    new_rows = [row for row in unique_rows if key(row) not in existing]
+    if not new_rows:
+        return []
+    result = await db.scalars(insert(model).returning(model), new_rows)
+    return list(result.all())
@@ -1,15 +1,96 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+import logging
+import random
+import time
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from app.core.config import settings
 
-DATABASE_URL = settings.DATABASE_URL
-if DATABASE_URL.startswith("sqlite"):
-    DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://")
+logger = logging.getLogger(__name__)
 
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True
-)
+# 非同期ドライバを指定していないURLに補うドライバ
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "postgres": "asyncpg"}
+
+def async_database_url(url: str) -> str:
+    """sqlite:// や postgresql:// を非同期ドライバ付きのURLにする（指定済みならそのまま）"""
+    parsed = make_url(url)
+    if "+" in parsed.drivername or parsed.drivername not in ASYNC_DRIVERS:
+        return url
+    backend = "postgresql" if parsed.drivername == "postgres" else parsed.drivername
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[parsed.drivername]}").render_as_string(hide_password=False)
+
+def sqlite_pragmas() -> Dict[str, Any]:
+    return {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+    }
+
+def build_engine(
+    url: str,
+    pragmas: Optional[Dict[str, Any]] = None,
+    **options: Any
+) -> AsyncEngine:
+    """
+    設定に沿ってエンジンを作る（options は create_async_engine への引数を上書きする）
+    PostgreSQL はプール設定、SQLite は接続ごとのPRAGMAを適用し、遅いクエリを記録する
+    """
+    url = async_database_url(url)
+    is_sqlite = make_url(url).get_backend_name() == "sqlite"
+    engine_options: Dict[str, Any] = {"echo": settings.DB_ECHO}
+    if not is_sqlite:
+        engine_options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+    engine_options.update(options)
+    engine = create_async_engine(url, **engine_options)
+
+    if is_sqlite:
+        _apply_sqlite_pragmas(engine, sqlite_pragmas() if pragmas is None else pragmas)
+    _log_slow_queries(engine)
+    return engine
+
+def _apply_sqlite_pragmas(engine: AsyncEngine, pragmas: Dict[str, Any]) -> None:
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def _log_slow_queries(engine: AsyncEngine) -> None:
+    """DB_SLOW_QUERY_MS 以上かかった文を DB_SLOW_QUERY_SAMPLE_RATE の割合で警告ログに出す"""
+    if settings.DB_SLOW_QUERY_MS <= 0 or settings.DB_SLOW_QUERY_SAMPLE_RATE <= 0:
+        return
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def check_elapsed(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_started"].pop()) * 1000
+        if elapsed_ms < settings.DB_SLOW_QUERY_MS or random.random() >= settings.DB_SLOW_QUERY_SAMPLE_RATE:
+            return
+        rows = f" x{len(parameters)}" if executemany else ""
+        logger.warning(f"Slow query ({elapsed_ms:.0f} ms{rows}): {' '.join(statement.split())[:500]}")
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def discard_timer(exception_context):
+        started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+        if started:
+            started.pop()
+
+DATABASE_URL = async_database_url(settings.DATABASE_URL)
+
+engine = build_engine(DATABASE_URL)
 
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -25,4 +106,4 @@ async def get_db():
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
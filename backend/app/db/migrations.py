@@ -0,0 +1,121 @@
+"""
+起動時に流す軽量マイグレーション（create_all では対応できない既存テーブルの変更）
+
+適用済みの名前を schema_migrations に記録するので、何度起動しても各処理は1回だけ実行される。
+新しい変更は MIGRATIONS の末尾に追加する（並び替え・削除はしない）
+"""
+import logging
+from collections import defaultdict
+from typing import Callable, List, Tuple
+from sqlalchemy import Column, DateTime, String, Table, inspect, insert, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.sql import func
+from app.db.database import Base
+from app.models.route import RouteSpot
+from app.services.geometry import decode_polyline, order_along_polyline
+
+logger = logging.getLogger(__name__)
+
+schema_migrations = Table(
+    "schema_migrations",
+    Base.metadata,
+    Column("name", String(100), primary_key=True),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+def _link_legacy_route_spots(conn: Connection) -> None:
+    """historical_spots.route_id（旧スキーマの単一ルート参照）を route_spots に移す"""
+    columns = {column["name"] for column in inspect(conn).get_columns("historical_spots")}
+    if "route_id" not in columns:
+        return
+
+    rows = conn.execute(text(
+        "SELECT s.id, s.route_id, s.lat, s.lng, r.polyline "
+        "FROM historical_spots s JOIN routes r ON r.id = s.route_id "
+        "ORDER BY s.route_id, s.id"
+    )).all()
+    by_route = defaultdict(list)
+    for row in rows:
+        by_route[(row.route_id, row.polyline)].append(row)
+
+    links = []
+    for (route_id, polyline), spots in by_route.items():
+        positions, along = order_along_polyline(
+            [(spot.lat, spot.lng) for spot in spots],
+            decode_polyline(polyline or "")
+        )
+        for spot, position, along_m in zip(spots, positions, along):
+            links.append({
+                "route_id": route_id,
+                "spot_id": spot.id,
+                "position": int(position),
+                "along_track_m": float(along_m)
+            })
+    if links:
+        conn.execute(insert(RouteSpot.__table__), links)
+    # 旧カラムは残すが、今後は参照しない（SQLiteの古い版は DROP COLUMN できないため）
+    logger.info(f"Linked {len(links)} legacy spots across {len(by_route)} routes")
+
+def _add_leaderboard_indexes(conn: Connection) -> None:
+    """ランキングと期間集計の索引（create_all は既存テーブルに索引を足さない）"""
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_users_total_score_id ON users (total_score, id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_quiz_attempts_attempted_at ON quiz_attempts (attempted_at)"))
+
+def _add_history_indexes(conn: Connection) -> None:
+    """ルート履歴・回答履歴のキーセットページング用の複合索引"""
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_routes_user_created ON routes (user_id, created_at DESC, id DESC)"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_quiz_attempts_user_attempted ON quiz_attempts (user_id, attempted_at DESC, id DESC)"
+    ))
+
+def _add_client_attempt_id(conn: Connection) -> None:
+    """quiz_attempts.client_attempt_id（一括送信の冪等キー）とユーザーごとの一意索引"""
+    columns = {column["name"] for column in inspect(conn).get_columns("quiz_attempts")}
+    if "client_attempt_id" not in columns:
+        conn.execute(text("ALTER TABLE quiz_attempts ADD COLUMN client_attempt_id VARCHAR(64)"))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_quiz_attempts_user_client ON quiz_attempts (user_id, client_attempt_id)"
+    ))
+
+def _dedupe_quizzes(conn: Connection) -> None:
+    """
+    同じ (spot_id, difficulty, question) のクイズを最も古い行にまとめ、一意索引を張る
+    回答履歴は残す行に付け替えてから重複行を消す
+    """
+    duplicate = (
+        "SELECT 1 FROM quizzes k WHERE k.spot_id = q.spot_id AND k.difficulty = q.difficulty "
+        "AND k.question = q.question AND k.id < q.id"
+    )
+    conn.execute(text(
+        "UPDATE quiz_attempts SET quiz_id = ("
+        "SELECT MIN(k.id) FROM quizzes k JOIN quizzes q ON k.spot_id = q.spot_id "
+        "AND k.difficulty = q.difficulty AND k.question = q.question WHERE q.id = quiz_attempts.quiz_id"
+        f") WHERE quiz_id IN (SELECT q.id FROM quizzes q WHERE EXISTS ({duplicate}))"
+    ))
+    removed = conn.execute(text(f"DELETE FROM quizzes WHERE id IN (SELECT q.id FROM quizzes q WHERE EXISTS ({duplicate}))"))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_quizzes_spot_difficulty_question ON quizzes (spot_id, difficulty, question)"
+    ))
+    logger.info(f"Removed {removed.rowcount} duplicate quizzes")
+
+MIGRATIONS: List[Tuple[str, Callable[[Connection], None]]] = [
+    ("0001_route_spots", _link_legacy_route_spots),
+    ("0002_leaderboard_indexes", _add_leaderboard_indexes),
+    ("0003_history_indexes", _add_history_indexes),
+    ("0004_quiz_attempt_client_id", _add_client_attempt_id),
+    ("0005_unique_quizzes", _dedupe_quizzes),
+]
+
+def _apply(conn: Connection) -> None:
+    applied = set(conn.execute(select(schema_migrations.c.name)).scalars())
+    for name, migrate in MIGRATIONS:
+        if name in applied:
+            continue
+        migrate(conn)
+        conn.execute(insert(schema_migrations).values(name=name))
+        logger.info(f"Applied migration {name}")
+
+async def run_migrations(conn: AsyncConnection) -> None:
+    """create_all の後、同じトランザクション内で未適用のマイグレーションを流す"""
+    await conn.run_sync(_apply)
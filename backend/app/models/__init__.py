@@ -1,5 +1,7 @@
 from .user import User
 from .quiz import Quiz, QuizAttempt
-from .route import Route, HistoricalSpot
+from .route import Route, HistoricalSpot, RouteSpot
+from .cache import GeocodeCacheEntry, LLMResponseCacheEntry
+from .telemetry import LLMCallMetric
 
-__all__ = ["User", "Quiz", "QuizAttempt", "Route", "HistoricalSpot"]
\ No newline at end of file
+__all__ = ["User", "Quiz", "QuizAttempt", "Route", "HistoricalSpot", "RouteSpot", "GeocodeCacheEntry", "LLMResponseCacheEntry", "LLMCallMetric"]
\ No newline at end of file
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, DateTime, Float, Integer, Text
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+class GeocodeCacheEntry(Base):
+    __tablename__ = "geocode_cache"
+    
+    query_key = Column(String(300), primary_key=True)  # 正規化済みの検索文字列
+    query = Column(String(300), nullable=False)
+    lat = Column(Float, nullable=False)
+    lng = Column(Float, nullable=False)
+    formatted_address = Column(String(300))
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+class LLMResponseCacheEntry(Base):
+    __tablename__ = "llm_response_cache"
+    
+    cache_key = Column(String(64), primary_key=True)  # プロンプトとモデル設定のSHA-256
+    variant = Column(Integer, primary_key=True, default=0)  # 同一キーで貯める応答の枠番号
+    model = Column(String(100), nullable=False)
+    response = Column(Text, nullable=False)
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
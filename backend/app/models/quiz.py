@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Float, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Float, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
@@ -18,6 +18,11 @@ class Quiz(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     attempts = relationship("QuizAttempt", back_populates="quiz")
+    
+    # 同じスポット・難易度の同じ問題は1行だけ（同時に生成・保存しても重複させない）
+    __table_args__ = (
+        Index("ux_quizzes_spot_difficulty_question", "spot_id", "difficulty", "question", unique=True),
+    )
 
 class QuizAttempt(Base):
     __tablename__ = "quiz_attempts"
@@ -29,8 +34,16 @@ class QuizAttempt(Base):
     selected_answer = Column(Integer)
     is_correct = Column(Boolean)
     points_earned = Column(Integer, default=0)
-    attempted_at = Column(DateTime(timezone=True), server_default=func.now())
+    attempted_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    client_attempt_id = Column(String(64))  # クライアントが振る冪等キー（オフライン回答の一括送信の再送対策）
     
     user = relationship("User", back_populates="quiz_attempts")
     quiz = relationship("Quiz", back_populates="attempts")
-    route = relationship("Route", back_populates="quiz_attempts")
\ No newline at end of file
+    route = relationship("Route", back_populates="quiz_attempts")
+    
+    # 回答履歴のキーセットページング（ユーザーごとに新しい順）
+    # 冪等キーはユーザーごとに一意（NULL は重複可）
+    __table_args__ = (
+        Index("ix_quiz_attempts_user_attempted", "user_id", attempted_at.desc(), id.desc()),
+        Index("ux_quiz_attempts_user_client", "user_id", "client_attempt_id", unique=True),
+    )
\ No newline at end of file
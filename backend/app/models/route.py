@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
@@ -20,14 +20,25 @@ class Route(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     user = relationship("User", back_populates="routes")
-    historical_spots = relationship("HistoricalSpot", back_populates="route")
+    # スポットは複数ルートで共有する（route_spots 経由、ルート上の並び順で返す）
+    historical_spots = relationship(
+        "HistoricalSpot",
+        secondary="route_spots",
+        order_by="RouteSpot.position",
+        back_populates="routes",
+        viewonly=True
+    )
     quiz_attempts = relationship("QuizAttempt", back_populates="route")
+    
+    # INSERT時に created_at も RETURNING で受け取り、保存直後のレスポンスで再読込しない
+    __mapper_args__ = {"eager_defaults": True}
+    # ルート履歴のキーセットページング（ユーザーごとに新しい順）
+    __table_args__ = (Index("ix_routes_user_created", "user_id", created_at.desc(), id.desc()),)
 
 class HistoricalSpot(Base):
     __tablename__ = "historical_spots"
     
     id = Column(Integer, primary_key=True, index=True)
-    route_id = Column(Integer, ForeignKey("routes.id"))
     place_id = Column(String(100), unique=True)
     name = Column(String(200), nullable=False)
     address = Column(String(300))
@@ -37,4 +48,18 @@ class HistoricalSpot(Base):
     types = Column(JSON)  # List of place types from Google
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
-    route = relationship("Route", back_populates="historical_spots")
\ No newline at end of file
+    routes = relationship(
+        "Route",
+        secondary="route_spots",
+        back_populates="historical_spots",
+        viewonly=True
+    )
+
+class RouteSpot(Base):
+    """ルートとスポットの対応（スポット本体は1件だけ保存し、ルート間で共有する）"""
+    __tablename__ = "route_spots"
+    
+    route_id = Column(Integer, ForeignKey("routes.id", ondelete="CASCADE"), primary_key=True)
+    spot_id = Column(Integer, ForeignKey("historical_spots.id", ondelete="CASCADE"), primary_key=True, index=True)
+    position = Column(Integer, nullable=False, default=0)  # ルート上の並び順（0始まり）
+    along_track_m = Column(Float)  # ルート始点からの道のり（メートル）
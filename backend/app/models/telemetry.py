@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+class LLMCallMetric(Base):
+    __tablename__ = "llm_call_metrics"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    model = Column(String(100), nullable=False)
+    kind = Column(String(20), nullable=False)  # text, json, batch, repair
+    difficulty = Column(String(20))
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    max_tokens = Column(Integer)
+    latency_ms = Column(Float, nullable=False)
+    finish_reason = Column(String(20))  # stop, length, error
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import String, DateTime, func
+from sqlalchemy import String, DateTime, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import Optional, List
 from datetime import datetime
@@ -17,4 +17,7 @@ class User(Base):
     updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
     
     quiz_attempts: Mapped[List["QuizAttempt"]] = relationship(back_populates="user")
-    routes: Mapped[List["Route"]] = relationship(back_populates="user")
\ No newline at end of file
+    routes: Mapped[List["Route"]] = relationship(back_populates="user")
+    
+    # ランキング（スコア降順・同点はID順）のキーセットページングと順位の集計用
+    __table_args__ = (Index("ix_users_total_score_id", "total_score", "id"),)
\ No newline at end of file
@@ -1,9 +1,13 @@
-from .user import UserCreate, UserResponse, UserUpdate, Token, TokenData
-from .quiz import QuizCreate, QuizResponse, QuizAttemptCreate, QuizAttemptResponse
+from .user import UserCreate, UserResponse, UserUpdate, LeaderboardEntry, RankResponse, Token, TokenData
+from .quiz import (
+    QuizCreate, QuizResponse, QuizAttemptCreate, QuizAttemptResponse,
+    QuizAttemptBatch, QuizAttemptBatchItem, QuizAttemptBatchResult, QuizAttemptBatchResponse
+)
 from .route import RouteCreate, RouteResponse, RouteSearch, HistoricalSpotResponse
 
 __all__ = [
-    "UserCreate", "UserResponse", "UserUpdate", "Token", "TokenData",
+    "UserCreate", "UserResponse", "UserUpdate", "LeaderboardEntry", "RankResponse", "Token", "TokenData",
     "QuizCreate", "QuizResponse", "QuizAttemptCreate", "QuizAttemptResponse",
+    "QuizAttemptBatch", "QuizAttemptBatchItem", "QuizAttemptBatchResult", "QuizAttemptBatchResponse",
     "RouteCreate", "RouteResponse", "RouteSearch", "HistoricalSpotResponse"
 ]
\ No newline at end of file
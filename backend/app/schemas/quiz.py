@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from datetime import datetime
 
 class QuizBase(BaseModel):
@@ -34,6 +34,27 @@ class QuizAttemptResponse(BaseModel):
     is_correct: bool
     points_earned: int
     attempted_at: datetime
+    client_attempt_id: Optional[str] = None
     
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+# 一括送信で1回に受け付ける回答数の上限
+MAX_BATCH_ATTEMPTS = 200
+
+class QuizAttemptBatchItem(QuizAttemptCreate):
+    client_attempt_id: str = Field(..., min_length=1, max_length=64)
+
+class QuizAttemptBatch(BaseModel):
+    attempts: List[QuizAttemptBatchItem] = Field(..., max_length=MAX_BATCH_ATTEMPTS)
+
+class QuizAttemptBatchResult(BaseModel):
+    client_attempt_id: str
+    # created: 今回保存 / duplicate: 同じキーで保存済み / quiz_not_found: クイズが存在しない
+    status: Literal["created", "duplicate", "quiz_not_found"]
+    attempt: Optional[QuizAttemptResponse] = None
+
+class QuizAttemptBatchResponse(BaseModel):
+    results: List[QuizAttemptBatchResult]
+    points_earned: int  # 今回新たに加算した点数
+    total_score: int
@@ -24,6 +24,19 @@ class UserResponse(UserBase):
     class Config:
         orm_mode = True
 
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    username: str
+    full_name: Optional[str] = None
+    score: int
+
+class RankResponse(BaseModel):
+    period: str
+    rank: Optional[int]  # 期間内に得点がなければ None
+    score: int
+    total_users: int
+
 class Token(BaseModel):
     access_token: str
     token_type: str
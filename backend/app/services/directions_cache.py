@@ -0,0 +1,105 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+from sqlalchemy import select
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.models.route import Route
+from app.services.cache import TTLCache, normalize_query
+from app.services.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+class DirectionsCache:
+    """
+    ルート検索結果のキャッシュ
+    メモリ → 保存済みの Route 行 → Directions API の順に引き、
+    同じ出発地・目的地への同時リクエストは1回の取得にまとめる
+    """
+
+    def __init__(self):
+        self.memory = TTLCache(
+            maxsize=settings.DIRECTIONS_CACHE_SIZE,
+            ttl=settings.DIRECTIONS_CACHE_TTL
+        )
+        self.flight = SingleFlight()
+        self.db_hits = 0
+        self.upstream_calls = 0
+
+    async def get_or_fetch(
+        self,
+        origin: str,
+        destination: str,
+        fetch: Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+    ) -> Optional[Dict[str, Any]]:
+        key = (normalize_query(origin), normalize_query(destination))
+        route = self.memory.get(key)
+        if route is None:
+            route = await self.flight.do(key, lambda: self._load(key, origin, destination, fetch))
+        return dict(route) if route else None
+
+    async def _load(
+        self,
+        key: tuple,
+        origin: str,
+        destination: str,
+        fetch: Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+    ) -> Optional[Dict[str, Any]]:
+        route = await self._from_saved_routes(origin, destination)
+        if route is not None:
+            self.db_hits += 1
+        else:
+            self.upstream_calls += 1
+            route = await fetch()
+
+        if route:
+            self.memory.set(key, route)
+        return route
+
+    async def _from_saved_routes(self, origin: str, destination: str) -> Optional[Dict[str, Any]]:
+        """保存済みの Route 行から、鮮度が許容範囲内のものを探す"""
+        if settings.DIRECTIONS_DB_MAX_AGE <= 0:
+            return None
+
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.DIRECTIONS_DB_MAX_AGE)
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(Route)
+                    .where(
+                        Route.origin.in_({origin, normalize_query(origin)}),
+                        Route.destination.in_({destination, normalize_query(destination)}),
+                        Route.polyline.isnot(None),
+                        Route.created_at >= cutoff
+                    )
+                    .order_by(Route.created_at.desc())
+                    .limit(1)
+                )
+                saved = result.scalar_one_or_none()
+        except Exception as e:
+            logger.warning(f"Directions cache lookup failed: {e}")
+            return None
+
+        if saved is None:
+            return None
+
+        return {
+            'origin': origin,
+            'destination': destination,
+            'origin_coords': {'lat': saved.origin_lat, 'lng': saved.origin_lng},
+            'dest_coords': {'lat': saved.dest_lat, 'lng': saved.dest_lng},
+            'distance': saved.distance,
+            'duration': saved.duration,
+            'polyline': saved.polyline,
+            'steps': []  # Route には案内ステップを保存していない
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory": self.memory.stats(),
+            "db_hits": self.db_hits,
+            "upstream_calls": self.upstream_calls,
+            "single_flight": self.flight.stats(),
+        }
+
+directions_cache = DirectionsCache()
@@ -0,0 +1,263 @@
+"""
+負荷試験用の Google Maps / OpenAI の代替バックエンド（UPSTREAM_BACKEND=fake で有効）
+
+記録済みのフィクスチャ（geocode・directions・places・completions）を返し、
+レイテンシとエラーを設定値どおりに注入する。APIの利用枠は一切使わない。
+フィクスチャにない地名・ルート・地点は、入力から決定的に合成して返す。
+"""
+import asyncio
+import hashlib
+import inspect
+import json
+import math
+import random
+import re
+import time
+import types
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import requests
+from openai.resources.chat.completions import AsyncCompletions
+from app.core.config import settings
+from app.services.cache import normalize_query
+from app.services.geometry import encode_polyline, haversine_m
+
+DEFAULT_FIXTURES = Path(__file__).resolve().parents[2] / "benchmarks" / "fixtures" / "upstreams.json"
+
+# 合成ルートの頂点間隔・最大頂点数と、所要時間の計算に使う平均速度
+ROUTE_VERTEX_SPACING_M = 500
+ROUTE_MAX_VERTICES = 400
+AVERAGE_SPEED_KMH = 45
+
+class FakeUpstreamError(Exception):
+    """注入したエラー（上流のタイムアウト・5xx相当）"""
+
+def load_fixtures() -> Dict[str, Any]:
+    path = Path(settings.FAKE_UPSTREAM_FIXTURES) if settings.FAKE_UPSTREAM_FIXTURES else DEFAULT_FIXTURES
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def _stable_hash(*parts: Any) -> int:
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+class _Injector:
+    """レイテンシ（対数正規分布のゆらぎ付き）とエラーの注入"""
+
+    def __init__(self, latency_ms: float, seed: Optional[int]):
+        self.latency_ms = latency_ms
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+
+    def delay(self) -> float:
+        if self.latency_ms <= 0:
+            return 0.0
+        jitter = self._random.lognormvariate(0, settings.FAKE_UPSTREAM_JITTER) if settings.FAKE_UPSTREAM_JITTER > 0 else 1.0
+        return self.latency_ms * jitter / 1000
+
+    def maybe_fail(self, name: str) -> None:
+        self.calls += 1
+        if self._random.random() < settings.FAKE_UPSTREAM_ERROR_RATE:
+            self.errors += 1
+            raise FakeUpstreamError(f"injected {name} failure")
+
+class FakeGoogleMapsClient:
+    """googlemaps.Client の代替（同期API。呼び出し側と同じくスレッドプールで実行される）"""
+
+    def __init__(self, fixtures: Optional[Dict[str, Any]] = None):
+        fixtures = fixtures or load_fixtures()
+        self.geocodes = {normalize_query(query): location for query, location in fixtures.get("geocode", {}).items()}
+        self.directions_fixtures = fixtures.get("directions", {})
+        self.places = fixtures.get("places", [])
+        self.session = requests.Session()
+        self.injector = _Injector(settings.FAKE_MAPS_LATENCY_MS, settings.FAKE_UPSTREAM_SEED)
+
+    def _enter(self, name: str) -> None:
+        time.sleep(self.injector.delay())
+        self.injector.maybe_fail(name)
+
+    def _locate(self, query: str) -> Dict[str, Any]:
+        location = self.geocodes.get(normalize_query(query))
+        if location:
+            return location
+        # 関東近辺の決定的な座標を割り当てる
+        seed = _stable_hash("geocode", normalize_query(query))
+        return {
+            "lat": 34.9 + (seed % 10000) / 10000 * 1.2,
+            "lng": 138.9 + (seed // 10000 % 10000) / 10000 * 1.2,
+            "formatted_address": f"日本、{query}",
+        }
+
+    def geocode(self, address: str, **kwargs: Any) -> List[Dict[str, Any]]:
+        self._enter("geocode")
+        location = self._locate(address)
+        return [{
+            "formatted_address": location.get("formatted_address", address),
+            "geometry": {"location": {"lat": location["lat"], "lng": location["lng"]}},
+        }]
+
+    def directions(self, origin: str, destination: str, **kwargs: Any) -> List[Dict[str, Any]]:
+        self._enter("directions")
+        recorded = self.directions_fixtures.get(f"{normalize_query(origin)}|{normalize_query(destination)}")
+        if recorded:
+            return recorded
+
+        start, end = self._locate(origin), self._locate(destination)
+        distance_m = float(haversine_m(start["lat"], start["lng"], end["lat"], end["lng"]))
+        count = int(min(ROUTE_MAX_VERTICES, max(2, distance_m // ROUTE_VERTEX_SPACING_M)))
+        # 直線だと不自然なので、進行方向と垂直に緩やかに蛇行させる
+        wiggle = 0.01 * ((_stable_hash(origin, destination) % 5) + 1)
+        coords = []
+        for i in range(count):
+            t = i / (count - 1)
+            offset = wiggle * math.sin(t * math.pi * 3)
+            coords.append((
+                start["lat"] + (end["lat"] - start["lat"]) * t + offset * (end["lng"] - start["lng"]),
+                start["lng"] + (end["lng"] - start["lng"]) * t - offset * (end["lat"] - start["lat"]),
+            ))
+        road_m = distance_m * 1.3
+        seconds = road_m / (AVERAGE_SPEED_KMH * 1000 / 3600)
+        leg = {
+            "distance": {"text": f"{road_m / 1000:.1f} km", "value": int(road_m)},
+            "duration": {"text": _duration_text(seconds), "value": int(seconds)},
+            "start_location": {"lat": start["lat"], "lng": start["lng"]},
+            "end_location": {"lat": end["lat"], "lng": end["lng"]},
+            "steps": [{
+                "html_instructions": f"{destination}方面へ進む",
+                "distance": {"text": f"{road_m / 1000:.1f} km", "value": int(road_m)},
+                "duration": {"text": _duration_text(seconds), "value": int(seconds)},
+                "start_location": {"lat": start["lat"], "lng": start["lng"]},
+                "end_location": {"lat": end["lat"], "lng": end["lng"]},
+            }],
+        }
+        return [{"legs": [leg], "overview_polyline": {"points": encode_polyline(coords)}}]
+
+    def places_nearby(
+        self,
+        location: Tuple[float, float],
+        radius: int = 5000,
+        keyword: Optional[str] = None,
+        **kwargs: Any
+    ) -> Dict[str, Any]:
+        self._enter("places_nearby")
+        lat, lng = location
+        seed = _stable_hash("nearby", round(lat, 3), round(lng, 3), keyword)
+        results = []
+        for rank in range(3):
+            index = (seed + rank * 7) % len(self.places)
+            angle = (seed >> (rank * 8)) % 360
+            reach = radius * 0.6 * ((seed >> (rank * 5)) % 100) / 100
+            place_lat = lat + reach * math.cos(math.radians(angle)) / 111195
+            place_lng = lng + reach * math.sin(math.radians(angle)) / (111195 * math.cos(math.radians(lat)))
+            place = self.places[index]
+            results.append({
+                "place_id": f"fake_{index}_{place_lat:.5f}_{place_lng:.5f}",
+                "name": place["name"],
+                "types": place.get("types", []),
+                "geometry": {"location": {"lat": place_lat, "lng": place_lng}},
+            })
+        return {"results": results, "status": "OK"}
+
+    def place(self, place_id: str, **kwargs: Any) -> Dict[str, Any]:
+        self._enter("place")
+        _, index, lat, lng = place_id.split("_")
+        place = self.places[int(index) % len(self.places)]
+        return {
+            "result": {
+                "name": place["name"],
+                "formatted_address": f"日本（{float(lat):.3f}, {float(lng):.3f}）",
+                "geometry": {"location": {"lat": float(lat), "lng": float(lng)}},
+                "types": place.get("types", []),
+            },
+            "status": "OK",
+        }
+
+# インストール済みSDKの chat.completions.create が受け付ける引数（本物が TypeError にする引数は代替でも拒否する）
+OPENAI_CREATE_PARAMS = frozenset(inspect.signature(AsyncCompletions.create).parameters) - {"self"}
+
+class _FakeCompletions:
+    def __init__(self, owner: "FakeAsyncOpenAI"):
+        self.owner = owner
+
+    async def create(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 300,
+        stream: bool = False,
+        response_format: Optional[Dict[str, str]] = None,
+        **kwargs: Any
+    ):
+        unknown = sorted(set(kwargs) - OPENAI_CREATE_PARAMS)
+        if unknown:
+            raise TypeError(f"create() got unexpected keyword arguments: {', '.join(unknown)}")
+        owner = self.owner
+        prompt = messages[-1]["content"]
+        content = owner.content_for(prompt, json_mode=bool(response_format))
+        usage = types.SimpleNamespace(
+            prompt_tokens=sum(len(message["content"]) for message in messages) // 2,
+            completion_tokens=len(content) // 2,
+        )
+        usage.total_tokens = usage.prompt_tokens + usage.completion_tokens
+        delay = owner.injector.delay()
+
+        if stream:
+            # 最初のトークンまでに全体の3割、残りをチャンクごとに均等に待つ
+            await asyncio.sleep(delay * 0.3)
+            owner.injector.maybe_fail("chat.completions")
+            include_usage = (kwargs.get("stream_options") or {}).get("include_usage", False)
+            return owner.stream(content, usage if include_usage else None, delay * 0.7)
+
+        await asyncio.sleep(delay)
+        owner.injector.maybe_fail("chat.completions")
+        message = types.SimpleNamespace(content=content, role="assistant")
+        return types.SimpleNamespace(
+            model=model,
+            choices=[types.SimpleNamespace(index=0, message=message, finish_reason="stop")],
+            usage=usage,
+        )
+
+class FakeAsyncOpenAI:
+    """openai.AsyncOpenAI の代替（chat.completions.create のみ。stream / response_format に対応）"""
+
+    def __init__(self, fixtures: Optional[Dict[str, Any]] = None):
+        fixtures = fixtures or load_fixtures()
+        completions = fixtures.get("completions", {})
+        self.text_completions = completions.get("text", [])
+        self.json_completions = completions.get("json", [])
+        self.injector = _Injector(settings.FAKE_OPENAI_LATENCY_MS, settings.FAKE_UPSTREAM_SEED)
+        self.chat = types.SimpleNamespace(completions=_FakeCompletions(self))
+
+    def content_for(self, prompt: str, json_mode: bool) -> str:
+        seed = _stable_hash("completion", prompt)
+        if not json_mode:
+            return self.text_completions[seed % len(self.text_completions)]
+        ids = [int(number) for number in re.findall(r"^(\d+)\. ", prompt, re.M)]
+        if not ids:
+            return json.dumps(self.json_completions[seed % len(self.json_completions)], ensure_ascii=False)
+        quizzes = [
+            {"id": quiz_id, **self.json_completions[(seed + quiz_id) % len(self.json_completions)]}
+            for quiz_id in ids
+        ]
+        return json.dumps({"quizzes": quizzes}, ensure_ascii=False)
+
+    async def stream(self, content: str, usage: Any, duration: float):
+        chunks = [content[i:i + 4] for i in range(0, len(content), 4)] or [""]
+        for index, text in enumerate(chunks):
+            await asyncio.sleep(duration / len(chunks))
+            choice = types.SimpleNamespace(
+                index=0,
+                delta=types.SimpleNamespace(content=text),
+                finish_reason="stop" if index == len(chunks) - 1 else None
+            )
+            yield types.SimpleNamespace(choices=[choice], usage=None)
+        if usage:
+            # stream_options={"include_usage": True} のときだけ、最後に使用量だけのチャンクが届く
+            yield types.SimpleNamespace(choices=[], usage=usage)
+
+def _duration_text(seconds: float) -> str:
+    minutes = int(round(seconds / 60))
+    if minutes < 60:
+        return f"{minutes}分"
+    return f"{minutes // 60}時間{minutes % 60}分"
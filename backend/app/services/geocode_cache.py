@@ -0,0 +1,83 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from sqlalchemy import select
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.models.cache import GeocodeCacheEntry
+from app.services.cache import TTLCache, normalize_query
+
+logger = logging.getLogger(__name__)
+
+class GeocodeCache:
+    """
+    ジオコーディング結果の2段キャッシュ
+    1段目: プロセス内LRU / 2段目: DBの geocode_cache テーブル
+    """
+
+    def __init__(self):
+        self.memory = TTLCache(
+            maxsize=settings.GEOCODE_CACHE_SIZE,
+            ttl=settings.GEOCODE_CACHE_TTL
+        )
+        self.db_hits = 0
+        self.db_misses = 0
+
+    async def get(self, query: str) -> Optional[Dict[str, Any]]:
+        key = normalize_query(query)
+        location = self.memory.get(key)
+        if location is not None:
+            return location
+
+        try:
+            cutoff = datetime.utcnow() - timedelta(seconds=settings.GEOCODE_CACHE_TTL)
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(GeocodeCacheEntry).where(
+                        GeocodeCacheEntry.query_key == key,
+                        GeocodeCacheEntry.fetched_at >= cutoff
+                    )
+                )
+                entry = result.scalar_one_or_none()
+        except Exception as e:
+            logger.warning(f"Geocode cache lookup failed: {e}")
+            return None
+
+        if entry is None:
+            self.db_misses += 1
+            return None
+
+        self.db_hits += 1
+        location = {
+            'lat': entry.lat,
+            'lng': entry.lng,
+            'formatted_address': entry.formatted_address
+        }
+        self.memory.set(key, location)
+        return location
+
+    async def set(self, query: str, location: Dict[str, Any]) -> None:
+        key = normalize_query(query)
+        self.memory.set(key, location)
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.merge(GeocodeCacheEntry(
+                    query_key=key,
+                    query=query,
+                    lat=location['lat'],
+                    lng=location['lng'],
+                    formatted_address=location.get('formatted_address'),
+                    fetched_at=datetime.utcnow()
+                ))
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Geocode cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory": self.memory.stats(),
+            "db_hits": self.db_hits,
+            "db_misses": self.db_misses,
+        }
+
+geocode_cache = GeocodeCache()
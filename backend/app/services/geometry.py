@@ -0,0 +1,184 @@
+"""
+ルート形状まわりの幾何計算（NumPyでベクトル化）
+設定やDBに依存しないので、api_server.py など別エントリポイントからも利用できる
+"""
+from typing import List, Optional, Sequence, Tuple, Union
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+
+Coords = Union[np.ndarray, Sequence[Tuple[float, float]]]
+
+
+def as_coords(coords: Coords) -> np.ndarray:
+    """(lat, lng) の並びを形状 (n, 2) の float64 配列に変換"""
+    return np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+
+
+def decode_polyline(encoded: str, precision: int = 5) -> np.ndarray:
+    """
+    Google エンコード済みポリラインを (n, 2) の float64 配列 [lat, lng] にデコード
+    文字ごとのループを使わず、5bitチャンクの連結・ジグザグ復号・累積和を一括で行う
+    """
+    if not encoded:
+        return np.empty((0, 2), dtype=np.float64)
+
+    data = np.frombuffer(encoded.encode("ascii"), dtype=np.uint8).astype(np.int64) - 63
+    if data.min() < 0 or data.max() > 0x3f:
+        raise ValueError("Invalid polyline: unexpected character")
+
+    is_last = data < 0x20
+    if not is_last[-1]:
+        raise ValueError("Invalid polyline: truncated value")
+
+    starts = np.flatnonzero(np.concatenate(([True], is_last[:-1])))
+    value_index = np.cumsum(np.concatenate(([0], is_last[:-1])))
+    position = np.arange(len(data)) - starts[value_index]
+    values = np.add.reduceat((data & 0x1f) << (5 * position), starts)
+    if len(values) % 2:
+        raise ValueError("Invalid polyline: odd number of values")
+
+    deltas = np.where(values & 1, ~(values >> 1), values >> 1)
+    return np.cumsum(deltas.reshape(-1, 2), axis=0) / 10 ** precision
+
+
+def encode_polyline(coords: Coords, precision: int = 5) -> str:
+    """(lat, lng) の並びを Google エンコード済みポリラインに変換（decode_polyline の逆）"""
+    points = as_coords(coords)
+    if len(points) == 0:
+        return ""
+
+    scaled = points * 10 ** precision
+    scaled = np.trunc(scaled + np.copysign(0.5, scaled)).astype(np.int64)  # 四捨五入（0から遠い方へ）
+    deltas = np.diff(scaled, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+
+    shifts = 5 * np.arange(7)  # 32bit値は最大7チャンク
+    chunk_count = 1 + np.count_nonzero(values[:, None] >> shifts[None, 1:], axis=1)
+    slot = np.arange(len(shifts))[None, :]
+    chunks = (values[:, None] >> shifts[None, :]) & 0x1f
+    chunks |= (slot < chunk_count[:, None] - 1) * 0x20
+    chars = (chunks + 63)[slot < chunk_count[:, None]]
+    return chars.astype(np.uint8).tobytes().decode("ascii")
+
+
+def haversine_m(
+    lat1: np.ndarray, lng1: np.ndarray, lat2: np.ndarray, lng2: np.ndarray
+) -> np.ndarray:
+    """2点間の大円距離（メートル）。配列同士ならブロードキャストして一括計算"""
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def segment_lengths_m(coords: Coords) -> np.ndarray:
+    points = as_coords(coords)
+    return haversine_m(points[:-1, 0], points[:-1, 1], points[1:, 0], points[1:, 1])
+
+
+def cumulative_distance_m(coords: Coords) -> np.ndarray:
+    """始点から各頂点までの道のり（メートル）。先頭は0"""
+    return np.concatenate(([0.0], np.cumsum(segment_lengths_m(coords))))
+
+
+def project_to_polyline(points: Coords, coords: Coords) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    各点をポリラインへ射影し、(最短距離, 始点からの道のり) をメートルで返す
+    距離は点まわりの正距円筒近似（数十km以内なら誤差は十分小さい）
+    """
+    pts = as_coords(points)
+    line = as_coords(coords)
+    if len(line) == 1:
+        line = np.vstack([line, line])
+
+    lat = pts[:, 0:1]
+    kx = np.radians(1.0) * EARTH_RADIUS_M * np.cos(np.radians(lat))
+    ky = np.radians(1.0) * EARTH_RADIUS_M
+    ax = (line[None, :-1, 1] - pts[:, 1:2]) * kx
+    ay = (line[None, :-1, 0] - lat) * ky
+    dx = (line[None, 1:, 1] - line[None, :-1, 1]) * kx
+    dy = (line[None, 1:, 0] - line[None, :-1, 0]) * ky
+
+    length_sq = dx * dx + dy * dy
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = np.where(length_sq > 0, -(ax * dx + ay * dy) / length_sq, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    distances = np.hypot(ax + t * dx, ay + t * dy)
+
+    nearest = distances.argmin(axis=1)
+    rows = np.arange(len(pts))
+    cumulative = cumulative_distance_m(line)
+    along = cumulative[nearest] + t[rows, nearest] * (cumulative[nearest + 1] - cumulative[nearest])
+    return distances[rows, nearest], along
+
+
+def order_along_polyline(points: Coords, coords: Coords) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    各点のルート上の並び順（0始まり）と始点からの道のり（メートル）を返す
+    ポリラインが空なら入力順・道のり0とする
+    """
+    pts = as_coords(points)
+    line = as_coords(coords)
+    if len(pts) == 0 or len(line) == 0:
+        return np.arange(len(pts)), np.zeros(len(pts))
+    along = project_to_polyline(pts, line)[1]
+    order = np.argsort(along, kind="stable")
+    positions = np.empty(len(pts), dtype=np.int64)
+    positions[order] = np.arange(len(pts))
+    return positions, along
+
+
+def point_to_polyline_m(points: Coords, coords: Coords) -> np.ndarray:
+    """各点からポリラインまでの最短距離（メートル）"""
+    return project_to_polyline(points, coords)[0]
+
+
+def coverage_spacing_m(radius_m: float, overlap: float = 0.1) -> float:
+    """半径 radius_m の検索円がルート上でわずかに重なって並ぶ間隔"""
+    return 2 * radius_m * (1 - overlap)
+
+
+def resample_by_distance(
+    coords: Coords,
+    spacing_m: float,
+    max_points: Optional[int] = None
+) -> np.ndarray:
+    """
+    ルートを道のり一定間隔で再サンプリングする
+    各点は区間 [k*spacing, (k+1)*spacing] の中央に置くので、始点・終点側も半径内に入る。
+    max_points を超える場合は間隔を広げてルート全体に均等に配置する
+    """
+    points = as_coords(coords)
+    if len(points) < 2:
+        return points.copy()
+
+    cumulative = cumulative_distance_m(points)
+    total = cumulative[-1]
+    if total == 0:
+        return points[:1].copy()
+
+    count = max(1, int(np.ceil(total / spacing_m)))
+    if max_points and count > max_points:
+        count = max_points
+    spacing = total / count
+    targets = (np.arange(count) + 0.5) * spacing
+
+    index = np.clip(np.searchsorted(cumulative, targets, side="right") - 1, 0, len(points) - 2)
+    seg_length = cumulative[index + 1] - cumulative[index]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = np.where(seg_length > 0, (targets - cumulative[index]) / seg_length, 0.0)
+    return points[index] + t[:, None] * (points[index + 1] - points[index])
+
+
+def sample_points_for_search(
+    coords: Coords,
+    radius_m: float,
+    max_points: Optional[int] = None,
+    overlap: float = 0.1
+) -> List[Tuple[float, float]]:
+    """Places検索用のサンプル地点（検索円がルートを隙間なく覆う間隔）"""
+    samples = resample_by_distance(coords, coverage_spacing_m(radius_m, overlap), max_points)
+    return [(float(lat), float(lng)) for lat, lng in samples]
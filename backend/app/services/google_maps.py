@@ -1,33 +1,101 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
 import googlemaps
-import polyline as polyline_lib
-from typing import List, Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from typing import List, Dict, Any, Optional, Callable, AsyncIterator, Tuple
 from app.core.config import settings
+from app.services.cache import normalize_query
+from app.services.directions_cache import directions_cache
+from app.services.geocode_cache import geocode_cache
+from app.services.geometry import Coords, decode_polyline, sample_points_for_search
+from app.services.singleflight import SingleFlight
+from app.services.spatial_index import spot_index
 import random
 
+logger = logging.getLogger(__name__)
+
 class GoogleMapsService:
     def __init__(self):
-        self.client = googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY)
+        if settings.UPSTREAM_BACKEND == "fake":
+            # 負荷試験用の代替は使うときだけ読み込む（本番の起動時には import しない）
+            from app.services.fake_upstreams import FakeGoogleMapsClient
+            self.client = FakeGoogleMapsClient()
+        else:
+            self.client = googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY)
+        # スレッド数に合わせてHTTP接続プールを広げ、接続を使い回す
+        adapter = HTTPAdapter(
+            pool_connections=settings.GOOGLE_MAPS_MAX_WORKERS,
+            pool_maxsize=settings.GOOGLE_MAPS_MAX_WORKERS
+        )
+        self.client.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.GOOGLE_MAPS_MAX_WORKERS,
+            thread_name_prefix="google-maps"
+        )
+        # 同じ引数の同時呼び出しは1回のAPI呼び出しを共有する
+        self.flight = SingleFlight(timeout=settings.GOOGLE_MAPS_FLIGHT_TIMEOUT)
+
+    async def _call(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """同期のgooglemaps呼び出しをスレッドプールで実行し、イベントループを塞がない"""
+        key = (func.__name__, repr(args), repr(sorted(kwargs.items())))
+        return await self.flight.do(key, lambda: self._run_in_executor(func, *args, **kwargs))
+
+    async def _run_in_executor(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
     
+    async def geocode(self, query: str) -> Optional[Dict[str, float]]:
+        """住所・地名を座標に変換（キャッシュがあればGeocoding APIを呼ばない）"""
+        # 表記揺れだけが違う同時リクエストも、キャッシュ参照からまとめて1回にする
+        return await self.flight.do(("geocode", normalize_query(query)), lambda: self._geocode(query))
+
+    async def _geocode(self, query: str) -> Optional[Dict[str, float]]:
+        location = await geocode_cache.get(query)
+        if location is None:
+            results = await self._call(self.client.geocode, query, language='ja')
+            if not results:
+                return None
+            location = {
+                'lat': results[0]['geometry']['location']['lat'],
+                'lng': results[0]['geometry']['location']['lng'],
+                'formatted_address': results[0].get('formatted_address')
+            }
+            await geocode_cache.set(query, location)
+        
+        return {'lat': location['lat'], 'lng': location['lng']}
+
     async def search_route(self, origin: str, destination: str) -> Dict[str, Any]:
         try:
-            # Geocoding for origin and destination
-            origin_geocode = self.client.geocode(origin, language='ja')
-            dest_geocode = self.client.geocode(destination, language='ja')
+            return await directions_cache.get_or_fetch(
+                origin,
+                destination,
+                lambda: self._fetch_route(origin, destination)
+            )
+        except Exception as e:
+            logger.error(f"Error in search_route: {e}")
+            return None
+
+    async def _fetch_route(self, origin: str, destination: str) -> Optional[Dict[str, Any]]:
+        try:
+            # Geocoding for origin and destination (in parallel, cached)
+            origin_coords, dest_coords = await asyncio.gather(
+                self.geocode(origin),
+                self.geocode(destination)
+            )
             
-            if not origin_geocode or not dest_geocode:
+            if not origin_coords or not dest_coords:
                 return None
             
-            origin_coords = {
-                'lat': origin_geocode[0]['geometry']['location']['lat'],
-                'lng': origin_geocode[0]['geometry']['location']['lng']
-            }
-            dest_coords = {
-                'lat': dest_geocode[0]['geometry']['location']['lat'],
-                'lng': dest_geocode[0]['geometry']['location']['lng']
-            }
-            
             # Get directions
-            directions = self.client.directions(
+            directions = await self._call(
+                self.client.directions,
                 origin,
                 destination,
                 mode="driving",
@@ -50,70 +118,195 @@ class GoogleMapsService:
                 'steps': route['legs'][0]['steps']
             }
         except Exception as e:
-            print(f"Error in search_route: {e}")
+            logger.error(f"Error in search_route: {e}")
             return None
     
     async def get_historical_spots_along_route(
         self, 
         polyline: str, 
-        num_points: int = 5
+        num_points: int = 5,
+        max_concurrency: Optional[int] = None,
+        call_timeout: Optional[float] = None
     ) -> List[Dict[str, Any]]:
+        """ルート沿いの歴史スポットを取得（サンプル地点順に並べて返す）"""
+        ordered = [
+            item async for item in self._fan_out_spots(
+                polyline, num_points, max_concurrency, call_timeout
+            )
+        ]
+        ordered.sort(key=lambda item: item[0])
+        return [spot for _, spot in ordered]
+
+    async def iter_historical_spots_along_route(
+        self,
+        polyline: str,
+        num_points: int = 5,
+        max_concurrency: Optional[int] = None,
+        call_timeout: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """ルート沿いの歴史スポットを、詳細取得が完了した順に逐次返す"""
+        async for _, spot in self._fan_out_spots(
+            polyline, num_points, max_concurrency, call_timeout
+        ):
+            yield spot
+
+    async def _fan_out_spots(
+        self,
+        polyline: str,
+        num_points: int,
+        max_concurrency: Optional[int],
+        call_timeout: Optional[float]
+    ) -> AsyncIterator[Tuple[Tuple[int, int], Dict[str, Any]]]:
+        """
+        Places検索のファンアウト
+        各サンプル地点の nearby 検索を同時に投げ、結果が届いた地点から順に
+        詳細(place)取得をパイプラインで流す。並列数と1呼び出しごとのタイムアウトを制御し、
+        全体の待ち時間が「全呼び出しの合計」ではなく「最も遅い呼び出し」で決まるようにする。
+        yield する値は ((地点index, 地点内順位), spot)
+        """
         try:
             # Decode polyline to get route coordinates
-            route_coords = polyline_lib.decode(polyline)
-            
-            # Sample points along the route
-            sample_interval = max(1, len(route_coords) // (num_points + 1))
-            sample_points = route_coords[::sample_interval][:num_points]
-            
-            historical_spots = []
-            spot_ids = set()
-            
-            search_keywords = [
-                "神社", "寺", "城", "史跡", "博物館", 
-                "神社仏閣", "歴史的建造物", "文化財"
-            ]
-            
-            for point in sample_points:
-                keyword = random.choice(search_keywords)
-                
-                # Search for places near each point
-                places_result = self.client.places_nearby(
-                    location=(point[0], point[1]),
-                    radius=5000,  # 5km radius
-                    keyword=keyword,
-                    language='ja'
-                )
-                
-                for place in places_result.get('results', [])[:2]:  # Get up to 2 places per point
-                    place_id = place.get('place_id')
-                    if place_id and place_id not in spot_ids:
-                        spot_ids.add(place_id)
-                        
-                        # Get detailed information
-                        place_details = self.client.place(
-                            place_id=place_id,
-                            language='ja',
-                            fields=['name', 'formatted_address', 'geometry', 'types']
-                        )
-                        
-                        if place_details.get('result'):
-                            details = place_details['result']
-                            historical_spots.append({
-                                'place_id': place_id,
-                                'name': details.get('name', '不明な場所'),
-                                'address': details.get('formatted_address', ''),
-                                'lat': details['geometry']['location']['lat'],
-                                'lng': details['geometry']['location']['lng'],
-                                'types': details.get('types', []),
-                                'description': self._generate_description(details.get('name', ''))
-                            })
-            
-            return historical_spots
+            route_coords = decode_polyline(polyline)
         except Exception as e:
-            print(f"Error in get_historical_spots: {e}")
+            logger.error(f"Error in get_historical_spots: {e}")
+            for index, spot in enumerate(self._get_sample_historical_spots()):
+                yield (index, 0), spot
+            return
+
+        sample_points = self._sample_points(route_coords, num_points)
+        semaphore = asyncio.Semaphore(max_concurrency or settings.PLACES_MAX_CONCURRENCY)
+        timeout = call_timeout or settings.PLACES_CALL_TIMEOUT
+        radius = settings.PLACES_SEARCH_RADIUS
+        queue: asyncio.Queue = asyncio.Queue()
+        spot_ids = set()
+        nearby_failures = 0
+
+        search_keywords = [
+            "神社", "寺", "城", "史跡", "博物館", 
+            "神社仏閣", "歴史的建造物", "文化財"
+        ]
+
+        async def fetch_details(order: Tuple[int, int], place_id: str) -> None:
+            # Get detailed information
+            place_details = await self._fan_out_call(
+                semaphore,
+                timeout,
+                self.client.place,
+                place_id=place_id,
+                language='ja',
+                fields=['name', 'formatted_address', 'geometry', 'types']
+            )
+            if place_details and place_details.get('result'):
+                queue.put_nowait((order, self._to_spot(place_id, place_details['result'])))
+
+        async def search_point(index: int, point: Tuple[float, float]) -> None:
+            nonlocal nearby_failures
+            # Search for places near each point
+            places_result = await self._fan_out_call(
+                semaphore,
+                timeout,
+                self.client.places_nearby,
+                location=(point[0], point[1]),
+                radius=radius,
+                keyword=random.choice(search_keywords),
+                language='ja'
+            )
+            if places_result is None:
+                nearby_failures += 1
+                return
+
+            details_tasks = []
+            for rank, place in enumerate(places_result.get('results', [])[:2]):  # Get up to 2 places per point
+                place_id = place.get('place_id')
+                if place_id and place_id not in spot_ids:
+                    spot_ids.add(place_id)
+                    details_tasks.append(
+                        asyncio.create_task(fetch_details((index, rank), place_id))
+                    )
+            await asyncio.gather(*details_tasks)
+
+        # 保存済みスポットで十分にカバーできている地点はローカルで答え、残りだけPlacesに問い合わせる
+        remote_points = []
+        local_count = 0
+        for index, point in enumerate(sample_points):
+            local_spots = [
+                spot for spot in spot_index.query_near(point[0], point[1], radius)
+                if spot['place_id'] not in spot_ids
+            ]
+            if len(local_spots) < settings.LOCAL_SPOTS_MIN_PER_POINT:
+                remote_points.append((index, point))
+                continue
+            for rank, spot in enumerate(local_spots[:2]):
+                spot_ids.add(spot['place_id'])
+                local_count += 1
+                yield (index, rank), spot
+
+        tasks = [
+            asyncio.create_task(search_point(index, point))
+            for index, point in remote_points
+        ]
+        def finish(future: asyncio.Future) -> None:
+            error = None if future.cancelled() else future.exception()
+            if error and not isinstance(error, asyncio.CancelledError):
+                logger.error(f"Error in get_historical_spots: {error}")
+            queue.put_nowait(None)
+
+        asyncio.gather(*tasks).add_done_callback(finish)
+
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                yield item
+        finally:
+            # 呼び出し側が途中で打ち切った場合も残りのタスクを片付ける
+            for task in tasks:
+                task.cancel()
+
+        if remote_points and nearby_failures == len(remote_points) and not local_count:
             # Return sample data if API fails
-            return self._get_sample_historical_spots()
+            for index, spot in enumerate(self._get_sample_historical_spots()):
+                yield (index, 0), spot
+
+    async def _fan_out_call(
+        self,
+        semaphore: asyncio.Semaphore,
+        timeout: float,
+        func: Callable[..., Any],
+        *args: Any,
+        **kwargs: Any
+    ) -> Optional[Any]:
+        """並列数制限・タイムアウト付きの呼び出し。失敗時は None を返す"""
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(self._call(func, *args, **kwargs), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Places call timed out after {timeout}s: {func.__name__}")
+            except Exception as e:
+                logger.error(f"Error in get_historical_spots: {e}")
+        return None
+
+    def _sample_points(
+        self,
+        route_coords: Coords,
+        num_points: int
+    ) -> List[Tuple[float, float]]:
+        # Sample points at fixed along-route distances so search circles just overlap
+        return sample_points_for_search(
+            route_coords, settings.PLACES_SEARCH_RADIUS, max_points=num_points
+        )
+
+    def _to_spot(self, place_id: str, details: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'place_id': place_id,
+            'name': details.get('name', '不明な場所'),
+            'address': details.get('formatted_address', ''),
+            'lat': details['geometry']['location']['lat'],
+            'lng': details['geometry']['location']['lng'],
+            'types': details.get('types', []),
+            'description': self._generate_description(details.get('name', ''))
+        }
     
     def _generate_description(self, name: str) -> str:
         descriptions = {
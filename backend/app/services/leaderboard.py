@@ -0,0 +1,139 @@
+import logging
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.models.quiz import QuizAttempt
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# 期間ランキングの集計対象（直近の期間）
+PERIODS = {
+    "weekly": timedelta(days=7),
+    "monthly": timedelta(days=30),
+}
+
+class Standings:
+    """
+    スコア降順（同点はユーザーID昇順）に並べた (user_id, score) の集合
+    (-score, user_id) の整列済みリストを二分探索するので、順位とページの位置は O(log n)
+    """
+
+    def __init__(self, scores: Iterable[Tuple[int, int]] = ()):
+        self._scores: Dict[int, int] = dict(scores)
+        self._keys: List[Tuple[int, int]] = sorted((-score, user_id) for user_id, score in self._scores.items())
+
+    def set(self, user_id: int, score: int) -> None:
+        previous = self._scores.get(user_id)
+        if previous == score:
+            return
+        if previous is not None:
+            del self._keys[bisect_left(self._keys, (-previous, user_id))]
+        self._scores[user_id] = score
+        insort(self._keys, (-score, user_id))
+
+    def add(self, user_id: int, points: int) -> None:
+        self.set(user_id, self._scores.get(user_id, 0) + points)
+
+    def score(self, user_id: int) -> Optional[int]:
+        return self._scores.get(user_id)
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """1始まりの順位（同点は同順位）。載っていなければ None"""
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        return bisect_left(self._keys, (-score,)) + 1
+
+    def page(self, limit: int, after: Optional[Tuple[int, int]] = None, offset: int = 0) -> List[Tuple[int, int]]:
+        """after=(score, user_id) の次から limit 件の (user_id, score) を返す"""
+        start = bisect_right(self._keys, (-after[0], after[1])) if after else 0
+        start += offset
+        return [(user_id, -negative) for negative, user_id in self._keys[start:start + limit]]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+class Leaderboard:
+    """
+    合計スコアと期間（週間・月間）のランキング
+    合計スコアは起動時にDBから読み込み、以降は回答ごとに差分で更新する。
+    LEADERBOARD_IN_MEMORY=false のときは users の (total_score, id) 索引を使ってDBから引く
+    """
+
+    def __init__(self):
+        self.total = Standings()
+        self.loaded = False
+        self._periods: Dict[str, Tuple[float, Standings]] = {}
+
+    async def load(self) -> None:
+        if not settings.LEADERBOARD_IN_MEMORY:
+            return
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(select(User.id, User.total_score))
+                self.total = Standings((user_id, score or 0) for user_id, score in result.all())
+            self.loaded = True
+            logger.info(f"Leaderboard loaded with {len(self.total)} users")
+        except Exception as e:
+            logger.error(f"Failed to load leaderboard: {e}")
+
+    def record(self, user_id: int, total_score: int, points: int = 0) -> None:
+        """コミット済みの合計スコアと、今回の獲得点を反映する"""
+        if self.loaded:
+            self.total.set(user_id, total_score)
+        if points:
+            for _, standings in self._periods.values():
+                standings.add(user_id, points)
+
+    async def total_page(
+        self,
+        db: AsyncSession,
+        limit: int,
+        after: Optional[Tuple[int, int]] = None,
+        offset: int = 0
+    ) -> List[Tuple[int, int]]:
+        if self.loaded:
+            return self.total.page(limit, after, offset)
+
+        query = select(User.id, User.total_score).order_by(User.total_score.desc(), User.id)
+        if after:
+            score, user_id = after
+            query = query.where(or_(
+                User.total_score < score,
+                and_(User.total_score == score, User.id > user_id)
+            ))
+        result = await db.execute(query.offset(offset).limit(limit))
+        return [(user_id, score) for user_id, score in result.all()]
+
+    async def total_rank(self, db: AsyncSession, user: User) -> Tuple[Optional[int], int]:
+        """(順位, 全ユーザー数)"""
+        if self.loaded:
+            return self.total.rank(user.id), len(self.total)
+
+        higher = await db.scalar(select(func.count()).where(User.total_score > user.total_score))
+        total = await db.scalar(select(func.count()).select_from(User))
+        return higher + 1, total
+
+    async def period(self, db: AsyncSession, period: str) -> Standings:
+        """期間内の獲得点のランキング（LEADERBOARD_PERIOD_TTL ごとに回答履歴から集計し直す）"""
+        cached = self._periods.get(period)
+        if cached and time.monotonic() - cached[0] < settings.LEADERBOARD_PERIOD_TTL:
+            return cached[1]
+
+        since = datetime.utcnow() - PERIODS[period]
+        result = await db.execute(
+            select(QuizAttempt.user_id, func.sum(QuizAttempt.points_earned))
+            .where(QuizAttempt.attempted_at >= since, QuizAttempt.points_earned > 0)
+            .group_by(QuizAttempt.user_id)
+        )
+        standings = Standings((user_id, int(points)) for user_id, points in result.all())
+        self._periods[period] = (time.monotonic(), standings)
+        return standings
+
+leaderboard = Leaderboard()
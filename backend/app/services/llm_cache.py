@@ -0,0 +1,161 @@
+import hashlib
+import json
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.models.cache import LLMResponseCacheEntry
+from app.services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# この回数の書き込みごとに期限切れ・上限超過の行を削除する
+PRUNE_EVERY = 100
+
+class LLMResponseCache:
+    """
+    LLM応答のキャッシュ（プロンプトとモデル設定のハッシュをキーに llm_response_cache テーブルへ保存）
+    同じキーに LLM_CACHE_VARIANTS 件まで別々の応答を貯め、枠が埋まった後はその中からランダムに返す
+    """
+
+    def __init__(self):
+        # 枠が埋まったキーの応答一覧だけをメモリに載せる
+        self.memory = TTLCache(
+            maxsize=settings.LLM_CACHE_MEMORY_SIZE,
+            ttl=settings.LLM_CACHE_TTL
+        )
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.saved_prompt_tokens = 0
+        self.saved_completion_tokens = 0
+
+    @staticmethod
+    def make_key(prompt: str, **params: Any) -> str:
+        payload = json.dumps({"prompt": prompt, **params}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """キャッシュ済みの応答を返す（枠が埋まっていなければ None で新しい応答を取りに行かせる）"""
+        if not settings.LLM_CACHE_ENABLED:
+            return None
+
+        variants = self.memory.get(key)
+        if variants is None:
+            variants = await self._load(key)
+            if len(variants) >= settings.LLM_CACHE_VARIANTS:
+                self.memory.set(key, variants)
+
+        if not variants or len(variants) < settings.LLM_CACHE_VARIANTS:
+            self.misses += 1
+            return None
+
+        entry = random.choice(variants)
+        self.hits += 1
+        self.saved_prompt_tokens += entry['prompt_tokens']
+        self.saved_completion_tokens += entry['completion_tokens']
+        return entry
+
+    async def set(self, key: str, model: str, response: str, usage: Dict[str, int]) -> None:
+        if not settings.LLM_CACHE_ENABLED:
+            return
+
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(LLMResponseCacheEntry.variant).where(
+                        LLMResponseCacheEntry.cache_key == key,
+                        LLMResponseCacheEntry.created_at >= self._cutoff()
+                    )
+                )
+                used = set(result.scalars().all())
+                free = [slot for slot in range(settings.LLM_CACHE_VARIANTS) if slot not in used]
+                if not free:
+                    return
+                variant = free[0]
+
+                await session.merge(LLMResponseCacheEntry(
+                    cache_key=key,
+                    variant=variant,
+                    model=model,
+                    response=response,
+                    prompt_tokens=usage.get('prompt_tokens', 0),
+                    completion_tokens=usage.get('completion_tokens', 0),
+                    created_at=datetime.utcnow()
+                ))
+                await session.commit()
+                self.writes += 1
+
+                if self.writes % PRUNE_EVERY == 0:
+                    await self._prune(session)
+        except IntegrityError:
+            # 同じ枠を同時に書き込んだ場合は先勝ちでよい
+            pass
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    async def _load(self, key: str) -> List[Dict[str, Any]]:
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(LLMResponseCacheEntry).where(
+                        LLMResponseCacheEntry.cache_key == key,
+                        LLMResponseCacheEntry.created_at >= self._cutoff()
+                    )
+                )
+                entries = result.scalars().all()
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {e}")
+            return []
+
+        return [
+            {
+                'response': entry.response,
+                'prompt_tokens': entry.prompt_tokens or 0,
+                'completion_tokens': entry.completion_tokens or 0
+            }
+            for entry in entries
+        ]
+
+    async def _prune(self, session) -> None:
+        """期限切れの行と、最大件数を超えた古い行を削除"""
+        await session.execute(
+            delete(LLMResponseCacheEntry).where(LLMResponseCacheEntry.created_at < self._cutoff())
+        )
+        result = await session.execute(
+            select(LLMResponseCacheEntry.created_at)
+            .order_by(LLMResponseCacheEntry.created_at.desc())
+            .offset(settings.LLM_CACHE_MAX_ENTRIES)
+            .limit(1)
+        )
+        oldest_kept = result.scalar_one_or_none()
+        if oldest_kept is not None:
+            await session.execute(
+                delete(LLMResponseCacheEntry).where(LLMResponseCacheEntry.created_at <= oldest_kept)
+            )
+        await session.commit()
+
+    def _cutoff(self) -> datetime:
+        return datetime.utcnow() - timedelta(seconds=settings.LLM_CACHE_TTL)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": settings.LLM_CACHE_ENABLED,
+            "variants": settings.LLM_CACHE_VARIANTS,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "writes": self.writes,
+            "saved_tokens": {
+                "prompt_tokens": self.saved_prompt_tokens,
+                "completion_tokens": self.saved_completion_tokens,
+                "total_tokens": self.saved_prompt_tokens + self.saved_completion_tokens
+            },
+        }
+
+llm_cache = LLMResponseCache()
@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import math
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import select
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.models.telemetry import LLMCallMetric
+
+logger = logging.getLogger(__name__)
+
+# モデルごとの料金（USD / 100万トークン: 入力, 出力）
+MODEL_PRICING: Dict[str, Tuple[float, float]] = {
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+}
+
+# max_tokens の自動調整に使う直近サンプル数（モデル・出力形式・難易度ごと）
+BUDGET_SAMPLES = 200
+# 集計時に読み込む最大行数
+SUMMARY_MAX_ROWS = 20000
+# バッファに溜める最大件数（書き出しが止まっていても際限なく増やさない）
+MAX_BUFFER = 10000
+
+BudgetKey = Tuple[str, str, Optional[str]]
+
+class LLMTelemetry:
+    """
+    LLM呼び出しごとのトークン数・レイテンシを llm_call_metrics テーブルに記録する
+    書き込みはバッファして定期的にまとめて行い、呼び出し側の待ち時間には含めない
+    """
+
+    def __init__(self):
+        self._buffer: List[Dict[str, Any]] = []
+        self._samples: Dict[BudgetKey, Deque[int]] = defaultdict(lambda: deque(maxlen=BUDGET_SAMPLES))
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """直近の計測値で max_tokens の見積もりを復元し、定期書き出しを始める"""
+        if self._flusher:
+            return
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(LLMCallMetric)
+                    .where(LLMCallMetric.kind.in_(("text", "json")))
+                    .order_by(LLMCallMetric.id.desc())
+                    .limit(SUMMARY_MAX_ROWS)
+                )
+                for metric in reversed(result.scalars().all()):
+                    self._add_sample(metric.model, metric.kind, metric.difficulty,
+                                     metric.completion_tokens, metric.max_tokens, metric.finish_reason)
+        except Exception as e:
+            logger.warning(f"LLM telemetry load failed: {e}")
+        self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self) -> None:
+        if self._flusher:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await self.flush()
+
+    def record(
+        self,
+        model: str,
+        kind: str,
+        latency_ms: float,
+        usage: Optional[Dict[str, int]] = None,
+        difficulty: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        finish_reason: Optional[str] = None
+    ) -> None:
+        usage = usage or {}
+        self._buffer.append({
+            "model": model,
+            "kind": kind,
+            "difficulty": difficulty,
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "max_tokens": max_tokens,
+            "latency_ms": latency_ms,
+            "finish_reason": finish_reason,
+            "created_at": datetime.utcnow(),
+        })
+        if len(self._buffer) > MAX_BUFFER:
+            del self._buffer[:len(self._buffer) - MAX_BUFFER]
+        self._add_sample(model, kind, difficulty, usage.get("completion_tokens", 0), max_tokens, finish_reason)
+
+    def _add_sample(
+        self,
+        model: str,
+        kind: str,
+        difficulty: Optional[str],
+        completion_tokens: int,
+        max_tokens: Optional[int],
+        finish_reason: Optional[str]
+    ) -> None:
+        if finish_reason == "error" or not completion_tokens:
+            return
+        if finish_reason == "length" and max_tokens:
+            # 途中で切れた回答は本来もっと長いので、上限より大きい値として数えて見積もりを引き上げる
+            completion_tokens = int(max_tokens * (1 + settings.OPENAI_TOKEN_BUDGET_MARGIN))
+        self._samples[(model, kind, difficulty)].append(completion_tokens)
+
+    def max_tokens_for(self, model: str, kind: str, difficulty: Optional[str]) -> int:
+        """観測した出力トークン数の p99 に余裕率を掛けた max_tokens（サンプル不足なら OPENAI_MAX_TOKENS）"""
+        if not settings.OPENAI_ADAPTIVE_MAX_TOKENS:
+            return settings.OPENAI_MAX_TOKENS
+        samples = self._samples.get((model, kind, difficulty))
+        if not samples or len(samples) < settings.OPENAI_TOKEN_BUDGET_MIN_SAMPLES:
+            return settings.OPENAI_MAX_TOKENS
+        budget = math.ceil(np.percentile(samples, 99) * (1 + settings.OPENAI_TOKEN_BUDGET_MARGIN))
+        return max(settings.OPENAI_MIN_TOKENS, min(settings.OPENAI_MAX_TOKENS, budget))
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(settings.LLM_TELEMETRY_FLUSH_INTERVAL)
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        try:
+            async with AsyncSessionLocal() as session:
+                session.add_all([LLMCallMetric(**row) for row in rows])
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"LLM telemetry write failed ({len(rows)} rows dropped): {e}")
+
+    async def summary(self) -> Dict[str, Any]:
+        """期間内の呼び出しをモデル・出力形式ごとに集計（パーセンタイル・コスト）"""
+        await self.flush()
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.LLM_TELEMETRY_WINDOW)
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(
+                    LLMCallMetric.model,
+                    LLMCallMetric.kind,
+                    LLMCallMetric.prompt_tokens,
+                    LLMCallMetric.completion_tokens,
+                    LLMCallMetric.latency_ms,
+                    LLMCallMetric.finish_reason
+                )
+                .where(LLMCallMetric.created_at >= cutoff)
+                .order_by(LLMCallMetric.id.desc())
+                .limit(SUMMARY_MAX_ROWS)
+            )
+            rows = result.all()
+
+        groups: Dict[Tuple[str, str], List[Any]] = defaultdict(list)
+        for row in rows:
+            groups[(row.model, row.kind)].append(row)
+
+        calls = []
+        total_cost = 0.0
+        for (model, kind), group in sorted(groups.items()):
+            ok = [row for row in group if row.finish_reason != "error"]
+            prompt_tokens = np.array([row.prompt_tokens or 0 for row in ok], dtype=np.float64)
+            completion_tokens = np.array([row.completion_tokens or 0 for row in ok], dtype=np.float64)
+            cost = _cost(model, prompt_tokens.sum(), completion_tokens.sum())
+            total_cost += cost or 0.0
+            calls.append({
+                "model": model,
+                "kind": kind,
+                "calls": len(group),
+                "errors": len(group) - len(ok),
+                "truncated": sum(row.finish_reason == "length" for row in ok),
+                "latency_ms": _percentiles([row.latency_ms for row in group]),
+                "prompt_tokens": _percentiles(prompt_tokens),
+                "completion_tokens": _percentiles(completion_tokens),
+                "cost_usd": {
+                    "total": cost,
+                    "per_call": round(cost / len(ok), 8) if cost is not None and ok else None
+                },
+            })
+
+        return {
+            "window_seconds": settings.LLM_TELEMETRY_WINDOW,
+            "calls": calls,
+            "total_cost_usd": round(total_cost, 6),
+            "max_tokens_budget": {
+                "/".join(str(part) for part in key): self.max_tokens_for(*key)
+                for key in sorted(self._samples, key=str)
+            },
+        }
+
+def _percentiles(values) -> Dict[str, Optional[float]]:
+    values = np.asarray(values, dtype=np.float64)
+    if not values.size:
+        return {"avg": None, "p50": None, "p90": None, "p99": None}
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {
+        "avg": round(float(values.mean()), 1),
+        "p50": round(float(p50), 1),
+        "p90": round(float(p90), 1),
+        "p99": round(float(p99), 1),
+    }
+
+def _cost(model: str, prompt_tokens: float, completion_tokens: float) -> Optional[float]:
+    pricing = next(
+        (price for name, price in sorted(MODEL_PRICING.items(), key=lambda item: -len(item[0]))
+         if model.startswith(name)),
+        None
+    )
+    if pricing is None:
+        return None
+    return round(float(prompt_tokens * pricing[0] + completion_tokens * pricing[1]) / 1_000_000, 6)
+
+llm_telemetry = LLMTelemetry()
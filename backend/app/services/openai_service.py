@@ -1,18 +1,37 @@
-from typing import Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import json
 import logging
+import time
 from openai import AsyncOpenAI
 from ..core.config import settings
+from .llm_cache import llm_cache
+from .llm_telemetry import llm_telemetry
+from .singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# 難易度ごとの獲得ポイント
+DIFFICULTY_POINTS = {"小学生": 10, "中学生": 15, "高校生": 20}
+
 class OpenAIService:
     def __init__(self):
-        self.client = AsyncOpenAI(
-            api_key=settings.OPENAI_API_KEY
-        ) if settings.OPENAI_API_KEY else None
+        if settings.UPSTREAM_BACKEND == "fake":
+            # fake のときだけ読み込む（代替はSDKの内部クラスを参照するため）
+            from .fake_upstreams import FakeAsyncOpenAI
+            self.client = FakeAsyncOpenAI()
+        else:
+            self.client = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY
+            ) if settings.OPENAI_API_KEY else None
         self.model = settings.OPENAI_MODEL
         self.max_tokens = settings.OPENAI_MAX_TOKENS
         self.temperature = settings.OPENAI_TEMPERATURE
+        # 同じスポット・難易度の同時生成は1回のAPI呼び出しを共有する
+        self.flight = SingleFlight(timeout=settings.OPENAI_FLIGHT_TIMEOUT)
+        # JSON出力モードの検証失敗回数と、出し直しで回復できた回数
+        self.parse_failures = 0
+        self.repairs = 0
 
     async def generate_quiz(
         self, 
@@ -24,22 +43,129 @@ class OpenAIService:
         歴史スポット情報からクイズを動的生成
         コスト効率を重視した実装
         """
+        quiz, _ = await self._generate_quiz_with_usage(spot_name, spot_description, difficulty)
+        return quiz
+
+    async def _generate_quiz_with_usage(
+        self,
+        spot_name: str,
+        spot_description: str,
+        difficulty: str = "中学生"
+    ) -> Tuple[Optional[Dict], Dict[str, int]]:
         if not self.client:
             logger.warning("OpenAI API key not configured")
-            return None
+            return None, _empty_usage()
+
+        try:
+            return await self.flight.do(
+                (spot_name, spot_description, difficulty),
+                lambda: self._request_quiz(spot_name, spot_description, difficulty)
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"OpenAI quiz generation timed out for {spot_name}")
+            return None, _empty_usage()
+
+    async def _request_quiz(
+        self,
+        spot_name: str,
+        spot_description: str,
+        difficulty: str
+    ) -> Tuple[Optional[Dict], Dict[str, int]]:
+        if settings.OPENAI_QUIZ_OUTPUT_MODE == "json":
+            return await self._request_json_quiz(spot_name, spot_description, difficulty)
+        return await self._request_text_quiz(spot_name, spot_description, difficulty)
+
+    async def _request_json_quiz(
+        self,
+        spot_name: str,
+        spot_description: str,
+        difficulty: str
+    ) -> Tuple[Optional[Dict], Dict[str, int]]:
+        """
+        JSON形式でクイズを生成し、検証してから返す
+        検証に失敗したらエラー内容を添えて OPENAI_QUIZ_MAX_REPAIRS 回まで出し直させる
+        """
+        points = DIFFICULTY_POINTS.get(difficulty, 15)
+        prompt = self._build_json_prompt(spot_name, spot_description, difficulty)
+        cache_key = llm_cache.make_key(
+            prompt,
+            model=self.model,
+            temperature=self.temperature,
+            response_format="json_object"
+        )
+        cached = await llm_cache.get(cache_key)
+        if cached:
+            try:
+                return self._parse_json_quiz(cached['response'], points), _empty_usage()
+            except ValueError:
+                pass
+
+        usage = _empty_usage()
+        history: List[Dict[str, str]] = []
+        request = prompt
+        max_tokens = llm_telemetry.max_tokens_for(self.model, "json", difficulty)
+        try:
+            for attempt in range(settings.OPENAI_QUIZ_MAX_REPAIRS + 1):
+                response = await self._complete(
+                    request,
+                    max_tokens,
+                    history=history,
+                    kind="repair" if attempt else "json",
+                    difficulty=difficulty,
+                    response_format={"type": "json_object"}
+                )
+                usage = _add_usage(usage, _usage_of(response))
+                quiz_text = response.choices[0].message.content or ""
+                try:
+                    quiz = self._parse_json_quiz(quiz_text, points)
+                except ValueError as e:
+                    self.parse_failures += 1
+                    logger.warning(f"Invalid quiz JSON for {spot_name} (attempt {attempt + 1}): {e}")
+                    history = history + [
+                        {"role": "user", "content": request},
+                        {"role": "assistant", "content": quiz_text}
+                    ]
+                    request = f"形式エラー: {e}。同じ形式のJSONのみで出し直してください。"
+                    continue
+
+                if attempt:
+                    self.repairs += 1
+                logger.info(f"Quiz generated for {spot_name} - Tokens used: {usage['total_tokens']}")
+                await llm_cache.set(cache_key, self.model, quiz_text, usage)
+                return quiz, usage
+        except Exception as e:
+            logger.error(f"OpenAI quiz generation error: {e}")
+            return None, usage
+
+        logger.error(f"OpenAI quiz generation gave up after {settings.OPENAI_QUIZ_MAX_REPAIRS} repairs: {spot_name}")
+        return None, usage
 
+    async def _request_text_quiz(
+        self,
+        spot_name: str,
+        spot_description: str,
+        difficulty: str
+    ) -> Tuple[Optional[Dict], Dict[str, int]]:
         try:
             # 難易度に応じたポイント設定
-            points = {"小学生": 10, "中学生": 15, "高校生": 20}.get(difficulty, 15)
+            points = DIFFICULTY_POINTS.get(difficulty, 15)
             
             # コスト効率重視のプロンプト（短く、明確に）
             prompt = self._build_prompt(spot_name, spot_description, difficulty)
             
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=self.max_tokens,
-                temperature=self.temperature
+            # 同じプロンプト・モデル設定の応答が保存済みならそれを使う
+            cache_key = llm_cache.make_key(
+                prompt, model=self.model, temperature=self.temperature
+            )
+            cached = await llm_cache.get(cache_key)
+            if cached:
+                return self._parse_quiz_response(cached['response'], points), _empty_usage()
+            
+            response = await self._complete(
+                prompt,
+                llm_telemetry.max_tokens_for(self.model, "text", difficulty),
+                kind="text",
+                difficulty=difficulty
             )
 
             quiz_text = response.choices[0].message.content
@@ -48,11 +174,288 @@ class OpenAIService:
             # コスト追跡のためのログ
             logger.info(f"Quiz generated for {spot_name} - Tokens used: {response.usage.total_tokens}")
             
-            return parsed_quiz
+            # 形式どおりの回答だけをキャッシュする（フォールバック値で埋めた回答は残さない）
+            if _is_complete_quiz_text(quiz_text):
+                await llm_cache.set(cache_key, self.model, quiz_text, _usage_of(response))
+            
+            return parsed_quiz, _usage_of(response)
 
         except Exception as e:
             logger.error(f"OpenAI quiz generation error: {e}")
-            return None
+            return None, _empty_usage()
+
+    async def stream_quiz(
+        self,
+        spot_name: str,
+        spot_description: str,
+        difficulty: str = "中学生"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        クイズをストリーミング生成し、行が確定するたびにイベントを返す
+        question → option ×4 → answer → explanation の順に届き、最後に確定版の quiz を返す
+        APIキー未設定・エラー時は quiz を返さずに終わる（呼び出し側でフォールバックする）
+        """
+        if not self.client:
+            logger.warning("OpenAI API key not configured")
+            return
+
+        points = DIFFICULTY_POINTS.get(difficulty, 15)
+        prompt = self._build_prompt(spot_name, spot_description, difficulty)
+        cache_key = llm_cache.make_key(
+            prompt, model=self.model, temperature=self.temperature
+        )
+
+        cached = await llm_cache.get(cache_key)
+        if cached:
+            parser = QuizLineParser()
+            for event in parser.feed(cached['response']) + parser.close():
+                yield event
+            yield {"type": "quiz", "quiz": self._parse_quiz_response(cached['response'], points)}
+            return
+
+        parser = QuizLineParser()
+        usage = _empty_usage()
+        max_tokens = llm_telemetry.max_tokens_for(self.model, "text", difficulty)
+        finish_reason = None
+        first_token_ms = None
+        started = time.perf_counter()
+        try:
+            stream = await self._complete(prompt, max_tokens, stream=True)
+            async for chunk in stream:
+                # 使用量付きのチャンクは新しいSDK・APIでしか届かない（届かなければ文字数から概算する）
+                if getattr(chunk, "usage", None):
+                    usage = _usage_of(chunk)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if first_token_ms is None:
+                        first_token_ms = (time.perf_counter() - started) * 1000
+                    for event in parser.feed(chunk.choices[0].delta.content):
+                        yield event
+                if chunk.choices and getattr(chunk.choices[0], "finish_reason", None):
+                    finish_reason = chunk.choices[0].finish_reason
+            for event in parser.close():
+                yield event
+            if not usage["total_tokens"]:
+                usage = _estimate_usage(prompt, parser.text)
+        except Exception as e:
+            logger.error(f"OpenAI quiz streaming error: {e}")
+            llm_telemetry.record(
+                self.model, "text", (time.perf_counter() - started) * 1000,
+                difficulty=difficulty, max_tokens=max_tokens, finish_reason="error"
+            )
+            return
+
+        llm_telemetry.record(
+            self.model, "text", (time.perf_counter() - started) * 1000, usage,
+            difficulty=difficulty, max_tokens=max_tokens, finish_reason=finish_reason
+        )
+        logger.info(
+            f"Quiz streamed for {spot_name} - Tokens used: {usage['total_tokens']}, "
+            f"first token: {first_token_ms or 0:.0f}ms"
+        )
+        if _is_complete_quiz_text(parser.text):
+            await llm_cache.set(cache_key, self.model, parser.text, usage)
+        yield {"type": "quiz", "quiz": self._parse_quiz_response(parser.text, points)}
+
+    async def generate_quizzes_batch(self, items: List[Dict[str, str]]) -> List[Dict]:
+        """
+        複数スポット・難易度のクイズを1回の補完でまとめて生成
+        items: [{"spot_name", "spot_description", "difficulty"}, ...]
+        戻り値は items と同じ順で {"quiz", "usage", "source"}。
+        解析できなかった項目だけ1問ずつの生成にフォールバックする
+        """
+        size = max(1, settings.OPENAI_BATCH_SIZE)
+        chunks = [items[i:i + size] for i in range(0, len(items), size)]
+        results = await asyncio.gather(*[self._generate_batch_chunk(chunk) for chunk in chunks])
+        return [result for chunk in results for result in chunk]
+
+    async def _generate_batch_chunk(self, items: List[Dict[str, str]]) -> List[Dict]:
+        payloads: Dict[int, Dict] = {}
+        shares = [_empty_usage() for _ in items]
+
+        if self.client and len(items) > 1:
+            try:
+                response = await self._complete(
+                    self._build_batch_prompt(items),
+                    min(self.max_tokens * len(items), settings.OPENAI_BATCH_MAX_TOKENS),
+                    kind="batch",
+                    response_format={"type": "json_object"}
+                )
+                payloads = self._split_batch_response(response.choices[0].message.content)
+                shares = self._apportion_usage(_usage_of(response), len(items), payloads)
+                logger.info(f"Batch quiz generated for {len(items)} items - Tokens used: {response.usage.total_tokens}")
+            except Exception as e:
+                logger.error(f"OpenAI batch quiz generation error: {e}")
+
+        results: List[Optional[Dict]] = [None] * len(items)
+        retry = []
+        for index, item in enumerate(items):
+            try:
+                quiz = self._quiz_from_payload(
+                    payloads.get(index + 1), DIFFICULTY_POINTS.get(item['difficulty'], 15)
+                )
+            except ValueError:
+                retry.append(index)
+                continue
+            results[index] = {"quiz": quiz, "usage": shares[index], "source": "batch"}
+
+        singles = await asyncio.gather(*[
+            self._generate_quiz_with_usage(
+                items[index]['spot_name'],
+                items[index]['spot_description'],
+                items[index]['difficulty']
+            )
+            for index in retry
+        ])
+        for index, (quiz, usage) in zip(retry, singles):
+            results[index] = {
+                "quiz": quiz,
+                "usage": _add_usage(shares[index], usage),
+                "source": "single" if quiz else "failed"
+            }
+        return results
+
+    async def _complete(
+        self,
+        prompt: str,
+        max_tokens: int,
+        history: Optional[List[Dict[str, str]]] = None,
+        kind: str = "text",
+        difficulty: Optional[str] = None,
+        **kwargs
+    ):
+        """
+        チャット補完の呼び出し口（全てのOpenAI呼び出しはここを通す）
+        ストリーミング以外はトークン数・レイテンシを llm_telemetry に記録する
+        """
+        started = time.perf_counter()
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=(history or []) + [{"role": "user", "content": prompt}],
+                max_tokens=max_tokens,
+                temperature=self.temperature,
+                **kwargs
+            )
+        except Exception:
+            if not kwargs.get("stream"):
+                llm_telemetry.record(
+                    self.model, kind, (time.perf_counter() - started) * 1000,
+                    difficulty=difficulty, max_tokens=max_tokens, finish_reason="error"
+                )
+            raise
+
+        if not kwargs.get("stream"):
+            llm_telemetry.record(
+                self.model,
+                kind,
+                (time.perf_counter() - started) * 1000,
+                _usage_of(response),
+                difficulty=difficulty,
+                max_tokens=max_tokens,
+                finish_reason=getattr(response.choices[0], "finish_reason", None) if response.choices else None
+            )
+        return response
+
+    def _build_json_prompt(self, spot_name: str, spot_description: str, difficulty: str) -> str:
+        """JSON形式で答えさせる短いプロンプト"""
+        return f"""
+{spot_name}について{difficulty}レベルの4択クイズを1問作成。
+スポット情報: {spot_description}
+JSONのみで回答: {{"question":"問題文","options":["選択肢1","選択肢2","選択肢3","選択肢4"],"answer":正解の番号(1-4),"explanation":"簡潔な解説"}}
+""".strip()
+
+    def _parse_json_quiz(self, response: str, points: int) -> Dict:
+        """JSON形式の回答を検証して構造化データに変換（壊れていれば ValueError）"""
+        text = _strip_code_fence(response or "")
+        try:
+            payload = json.loads(text)
+        except ValueError:
+            # 前後に余計な文章が付いた回答は、最初の { から最後の } までを取り出して読み直す
+            start, end = text.find("{"), text.rfind("}")
+            if start < 0 or end <= start:
+                raise ValueError("response is not JSON")
+            payload = json.loads(text[start:end + 1])
+        return self._quiz_from_payload(payload, points)
+
+    def _build_batch_prompt(self, items: List[Dict[str, str]]) -> str:
+        """まとめて生成するためのプロンプト（説明部分は共通化して1回だけ送る）"""
+        spots = "\n".join(
+            f"{index}. {item['spot_name']}（{item['difficulty']}）: {item['spot_description']}"
+            for index, item in enumerate(items, start=1)
+        )
+        return f"""
+次の各スポットについて、指定レベルの4択クイズを1問ずつ作成してください。
+
+{spots}
+
+JSONのみで回答:
+{{"quizzes":[{{"id":番号,"question":"問題文","options":["選択肢1","選択肢2","選択肢3","選択肢4"],"answer":正解の番号(1-4),"explanation":"簡潔な解説"}}]}}
+""".strip()
+
+    def _split_batch_response(self, response: str) -> Dict[int, Dict]:
+        """まとめて生成した回答を id ごとの辞書に分割"""
+        data = json.loads(_strip_code_fence(response))
+        quizzes = data.get("quizzes", []) if isinstance(data, dict) else data
+        payloads = {}
+        for payload in quizzes:
+            try:
+                payloads[int(payload["id"])] = payload
+            except (KeyError, TypeError, ValueError):
+                continue
+        return payloads
+
+    def _quiz_from_payload(self, payload: Optional[Dict], points: int) -> Dict:
+        """JSON形式のクイズを検証して構造化データに変換（不正ならValueError）"""
+        if not isinstance(payload, dict):
+            raise ValueError("quiz payload is missing")
+
+        question = payload.get("question")
+        options = payload.get("options")
+        explanation = payload.get("explanation")
+        try:
+            answer = int(payload.get("answer"))
+        except (TypeError, ValueError):
+            raise ValueError("answer must be a number")
+
+        if not isinstance(question, str) or not question.strip():
+            raise ValueError("question must be a non-empty string")
+        if (
+            not isinstance(options, list) or len(options) != 4
+            or not all(isinstance(option, str) and option.strip() for option in options)
+        ):
+            raise ValueError("options must be 4 non-empty strings")
+        if not 1 <= answer <= 4:
+            raise ValueError("answer must be between 1 and 4")
+        if not isinstance(explanation, str) or not explanation.strip():
+            raise ValueError("explanation must be a non-empty string")
+
+        return {
+            "question": question.strip(),
+            "options": [option.strip() for option in options],
+            "correct_answer": answer - 1,
+            "explanation": explanation.strip(),
+            "points": points
+        }
+
+    def _apportion_usage(
+        self, usage: Dict[str, int], count: int, payloads: Dict[int, Dict]
+    ) -> List[Dict[str, int]]:
+        """まとめて生成したトークン数を項目ごとに按分（入力は均等、出力は回答の長さに比例）"""
+        sizes = [
+            len(json.dumps(payloads[index + 1], ensure_ascii=False)) if index + 1 in payloads else 0
+            for index in range(count)
+        ]
+        total_size = sum(sizes) or 1
+        shares = []
+        for size in sizes:
+            prompt_tokens = usage["prompt_tokens"] // count
+            completion_tokens = usage["completion_tokens"] * size // total_size
+            shares.append({
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            })
+        return shares
 
     def _build_prompt(self, spot_name: str, spot_description: str, difficulty: str) -> str:
         """コスト効率重視の短いプロンプト"""
@@ -82,17 +485,15 @@ class OpenAIService:
             explanation = ""
             
             for line in lines:
-                if line.startswith('問題:'):
-                    question = line.replace('問題:', '').strip()
-                elif line.startswith(('1.', '2.', '3.', '4.')):
-                    options.append(line[2:].strip())
-                elif line.startswith('正解:'):
-                    try:
-                        correct_answer = int(line.replace('正解:', '').strip()) - 1
-                    except ValueError:
-                        correct_answer = 0
-                elif line.startswith('解説:'):
-                    explanation = line.replace('解説:', '').strip()
+                field, value = _parse_quiz_line(line)
+                if field == 'question':
+                    question = value
+                elif field == 'option':
+                    options.append(value)
+                elif field == 'answer':
+                    correct_answer = value
+                elif field == 'explanation':
+                    explanation = value
             
             return {
                 "question": question or "この場所について正しいものはどれでしょう？",
@@ -127,16 +528,122 @@ class OpenAIService:
         }
 
     async def get_usage_stats(self) -> Dict:
-        """API使用状況の取得（コスト管理用）"""
-        # 実装時はOpenAI APIの使用状況を取得
+        """API使用状況の取得（コスト管理用、llm_call_metrics の実測値から集計）"""
+        telemetry = await llm_telemetry.summary()
+        # 出し直しのコストも含めた、1問生成あたりの平均コスト
+        quiz_calls = [
+            group for group in telemetry["calls"]
+            if group["model"] == self.model and group["kind"] in ("text", "json", "repair")
+        ]
+        quiz_cost = sum(group["cost_usd"]["total"] or 0.0 for group in quiz_calls)
+        quiz_count = sum(
+            group["calls"] - group["errors"] for group in quiz_calls if group["kind"] != "repair"
+        )
         return {
             "model": self.model,
-            "estimated_cost_per_quiz": 0.001,  # 約0.1円/クイズ
+            "estimated_cost_per_quiz": round(quiz_cost / quiz_count, 6) if quiz_count else None,
+            "telemetry": telemetry,
             "current_settings": {
                 "max_tokens": self.max_tokens,
-                "temperature": self.temperature
-            }
+                "temperature": self.temperature,
+                "output_mode": settings.OPENAI_QUIZ_OUTPUT_MODE
+            },
+            "structured_output": {
+                "parse_failures": self.parse_failures,
+                "repairs": self.repairs
+            },
+            "response_cache": llm_cache.stats(),
+            "single_flight": self.flight.stats()
         }
 
+def _empty_usage() -> Dict[str, int]:
+    return {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+
+def _usage_of(response) -> Dict[str, int]:
+    return {
+        "prompt_tokens": response.usage.prompt_tokens,
+        "completion_tokens": response.usage.completion_tokens,
+        "total_tokens": response.usage.total_tokens
+    }
+
+def _estimate_usage(prompt: str, completion: str) -> Dict[str, int]:
+    """使用量が返らないストリーミング用の概算（日本語はおおむね1文字1トークン）"""
+    prompt_tokens, completion_tokens = len(prompt), len(completion)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens
+    }
+
+def _add_usage(a: Dict[str, int], b: Dict[str, int]) -> Dict[str, int]:
+    return {key: a[key] + b[key] for key in a}
+
+def _parse_quiz_line(line: str) -> Tuple[Optional[str], Any]:
+    """回答1行を (項目名, 値) に変換（該当しない行は (None, None)）"""
+    if line.startswith('問題:'):
+        return 'question', line.replace('問題:', '').strip()
+    if line.startswith(('1.', '2.', '3.', '4.')):
+        return 'option', line[2:].strip()
+    if line.startswith('正解:'):
+        try:
+            return 'answer', int(line.replace('正解:', '').strip()) - 1
+        except ValueError:
+            return 'answer', 0
+    if line.startswith('解説:'):
+        return 'explanation', line.replace('解説:', '').strip()
+    return None, None
+
+class QuizLineParser:
+    """ストリーミング中の回答を行単位で解析し、確定した行からイベントにする"""
+
+    def __init__(self):
+        self.text = ""
+        self._buffer = ""
+        self._option_count = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self.text += chunk
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split('\n')
+        return [event for event in map(self._to_event, lines) if event]
+
+    def close(self) -> List[Dict[str, Any]]:
+        """最後の（改行で終わらない）行を確定させる"""
+        line, self._buffer = self._buffer, ""
+        event = self._to_event(line)
+        return [event] if event else []
+
+    def _to_event(self, line: str) -> Optional[Dict[str, Any]]:
+        field, value = _parse_quiz_line(line.strip())
+        if field == 'question':
+            return {"type": "question", "question": value}
+        if field == 'option':
+            self._option_count += 1
+            return {"type": "option", "index": self._option_count - 1, "text": value}
+        if field == 'answer':
+            return {"type": "answer", "correct_answer": max(0, min(3, value))}
+        if field == 'explanation':
+            return {"type": "explanation", "explanation": value}
+        return None
+
+def _is_complete_quiz_text(text: str) -> bool:
+    """問題・4つの選択肢・正解・解説がそろった回答か"""
+    lines = [line.strip() for line in (text or "").split('\n')]
+    options = [line for line in lines if line.startswith(('1.', '2.', '3.', '4.'))]
+    return (
+        any(line.startswith('問題:') for line in lines)
+        and len(options) == 4
+        and any(line.startswith('正解:') for line in lines)
+        and any(line.startswith('解説:') for line in lines)
+    )
+
+def _strip_code_fence(text: str) -> str:
+    """```json ... ``` で囲まれた回答から中身を取り出す"""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return text.strip()
+
 # シングルトンインスタンス
 openai_service = OpenAIService()
\ No newline at end of file
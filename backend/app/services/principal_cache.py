@@ -0,0 +1,75 @@
+from typing import Any, Dict, Optional
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from app.core.config import settings
+from app.models.user import User
+from app.services.cache import TTLCache
+
+class PrincipalCache:
+    """
+    認証済みユーザーのプロセス内キャッシュ（トークンの sub と iat をキーにする）
+    ユーザー行の列の値だけを保持し、取り出すときにリクエストのセッションへ
+    merge(load=False) で載せる（SQLは発行しない）。
+    プロフィールやスコアが変わったら invalidate でそのユーザーの全トークン分を無効にする
+    """
+
+    def __init__(self):
+        self.memory = TTLCache(
+            maxsize=settings.AUTH_USER_CACHE_SIZE,
+            ttl=settings.AUTH_USER_CACHE_TTL
+        )
+        # 世代は全ユーザー共通の通し番号。invalidate したユーザーにはその時点の世代を記録し、
+        # それより前の世代で読んだエントリは使わない。記録はエントリと同じ TTL で消えるので
+        # （消える前に、それより古いエントリは必ず期限切れになる）ユーザー数に比例して増えない
+        self._generation = 0
+        self._invalidated = TTLCache(
+            maxsize=settings.AUTH_USER_CACHE_SIZE,
+            ttl=settings.AUTH_USER_CACHE_TTL
+        )
+        # 記録が溢れて全体を捨てたときの世代（全ユーザーがこの世代で invalidate されたものとみなす）
+        self._floor = 0
+
+    def generation(self, username: str) -> int:
+        """DBから読む前に取得し、set に渡す（読み込み中の invalidate を取りこぼさない）"""
+        return self._generation
+
+    def _invalidated_at(self, username: str) -> int:
+        return max(self._invalidated.get(username, 0), self._floor)
+
+    async def get(self, db: AsyncSession, username: str, issued_at: Any) -> Optional[User]:
+        if settings.AUTH_USER_CACHE_TTL <= 0:
+            return None
+        entry = self.memory.get((username, issued_at))
+        if entry is None:
+            return None
+        generation, values = entry
+        if generation < self._invalidated_at(username):
+            self.memory.pop((username, issued_at))
+            return None
+
+        user = User(**values)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+    def set(self, username: str, issued_at: Any, user: User, generation: int) -> None:
+        if settings.AUTH_USER_CACHE_TTL <= 0 or generation < self._invalidated_at(username):
+            # 読み込み中に invalidate された行は入れない
+            return
+        values = {column.key: getattr(user, column.key) for column in inspect(User).column_attrs}
+        self.memory.set((username, issued_at), (generation, values))
+
+    def invalidate(self, username: str) -> None:
+        self._generation += 1
+        if len(self._invalidated) >= self._invalidated.maxsize and not self._invalidated.purge_expired():
+            # 有効な記録を追い出すと古いエントリが有効に戻るので、代わりに全体を捨てる
+            self.memory.clear()
+            self._invalidated.clear()
+            self._floor = self._generation
+            return
+        self._invalidated.set(username, self._generation)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.memory.stats()
+
+principal_cache = PrincipalCache()
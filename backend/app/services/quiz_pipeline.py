@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import random
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.bulk import insert_ignore_conflicts
+from app.db.database import AsyncSessionLocal
+from app.models.quiz import Quiz
+from app.services.openai_service import openai_service
+
+logger = logging.getLogger(__name__)
+
+DIFFICULTIES = ("小学生", "中学生", "高校生")
+
+class QuizPregenerationPipeline:
+    """
+    ルート検索で見つかったスポットのクイズを、全難易度ぶんバックグラウンドで事前生成する
+    生成結果は quizzes テーブルに spot_id 単位で保存し、クイズボタン押下時はそこから返す
+    """
+
+    def __init__(self):
+        self.queue: Optional[asyncio.Queue] = None
+        self._pending: Set[Tuple[str, str]] = set()  # キュー待ち・生成中の (spot_id, difficulty)
+        self._workers: List[asyncio.Task] = []
+        self._retry_tasks: Set[asyncio.Task] = set()  # バックオフ待ちの再投入（参照を持ち、停止時に取り消す）
+        self.enqueued = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self.generated = 0
+        self.retries = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self._workers:
+            return
+        self.queue = asyncio.Queue(maxsize=settings.QUIZ_PIPELINE_MAX_QUEUE)
+        self._workers = [
+            asyncio.create_task(self._worker())
+            for _ in range(settings.QUIZ_PIPELINE_WORKERS)
+        ]
+
+    async def stop(self) -> None:
+        tasks = self._workers + list(self._retry_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._retry_tasks.clear()
+
+    def enqueue_spots(
+        self, spots: Iterable[Dict[str, Any]], difficulties: Iterable[str] = DIFFICULTIES
+    ) -> int:
+        """スポットを難易度ごとにキューに積む（重複・APIキー未設定時は積まない）"""
+        if self.queue is None or not openai_service.client:
+            return 0
+
+        difficulties = tuple(difficulties)
+        count = 0
+        for spot in spots:
+            for difficulty in difficulties:
+                key = (spot['place_id'], difficulty)
+                if key in self._pending:
+                    self.deduplicated += 1
+                    continue
+                job = {
+                    'spot_id': spot['place_id'],
+                    'spot_name': spot['name'],
+                    'spot_description': spot.get('description') or '',
+                    'difficulty': difficulty,
+                    'attempt': 0
+                }
+                try:
+                    self.queue.put_nowait(job)
+                except asyncio.QueueFull:
+                    self.dropped += 1
+                    continue
+                self._pending.add(key)
+                count += 1
+        self.enqueued += count
+        return count
+
+    async def _worker(self) -> None:
+        while True:
+            # 待っているジョブをまとめて取り出し、1回の補完で生成する
+            jobs = [await self.queue.get()]
+            while len(jobs) < settings.OPENAI_BATCH_SIZE and not self.queue.empty():
+                jobs.append(self.queue.get_nowait())
+            try:
+                failed = await self._process(jobs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Quiz pre-generation batch error: {e}")
+                failed = jobs
+            finally:
+                for _ in jobs:
+                    self.queue.task_done()
+
+            failed_ids = {id(job) for job in failed}
+            for job in jobs:
+                if id(job) not in failed_ids:
+                    self._pending.discard((job['spot_id'], job['difficulty']))
+            for job in failed:
+                self._retry_or_fail(job)
+
+    def _retry_or_fail(self, job: Dict[str, Any]) -> None:
+        key = (job['spot_id'], job['difficulty'])
+        job['attempt'] += 1
+        if job['attempt'] > settings.QUIZ_PIPELINE_MAX_RETRIES:
+            logger.error(f"Quiz pre-generation failed for {key}")
+            self.failed += 1
+            self._pending.discard(key)
+        else:
+            self.retries += 1
+            task = asyncio.create_task(self._retry_later(job))
+            self._retry_tasks.add(task)
+            task.add_done_callback(self._retry_tasks.discard)
+
+    async def _retry_later(self, job: Dict[str, Any]) -> None:
+        await asyncio.sleep(settings.QUIZ_PIPELINE_RETRY_BACKOFF * 2 ** (job['attempt'] - 1))
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            self._pending.discard((job['spot_id'], job['difficulty']))
+
+    async def _process(self, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """ジョブをまとめて生成・保存し、生成に失敗したジョブを返す"""
+        async with AsyncSessionLocal() as session:
+            existing = await self._existing_keys(session, jobs)
+            todo = [job for job in jobs if (job['spot_id'], job['difficulty']) not in existing]
+            self.deduplicated += len(jobs) - len(todo)
+            if not todo:
+                return []
+
+            results = await openai_service.generate_quizzes_batch([
+                {
+                    'spot_name': job['spot_name'],
+                    'spot_description': job['spot_description'],
+                    'difficulty': job['difficulty']
+                }
+                for job in todo
+            ])
+
+            failed = []
+            rows = []
+            for job, result in zip(todo, results):
+                quiz_data = result['quiz']
+                if not quiz_data:
+                    failed.append(job)
+                    continue
+                rows.append(quiz_row(job['spot_id'], job['spot_name'], job['difficulty'], quiz_data))
+            await self.store_quizzes(session, rows)
+            await session.commit()
+            self.generated += len(todo) - len(failed)
+            return failed
+
+    async def _existing_keys(
+        self, session: AsyncSession, jobs: List[Dict[str, Any]]
+    ) -> Set[Tuple[str, str]]:
+        """保存済みの (spot_id, difficulty) を1回のクエリで調べる"""
+        result = await session.execute(
+            select(Quiz.spot_id, Quiz.difficulty)
+            .where(Quiz.spot_id.in_({job['spot_id'] for job in jobs}))
+            .distinct()
+        )
+        return {(spot_id, difficulty) for spot_id, difficulty in result}
+
+    async def get_stored_quiz(
+        self, db: AsyncSession, spot_id: str, difficulty: str
+    ) -> Optional[Quiz]:
+        """保存済みクイズから1問選んで返す（複数あればランダム）"""
+        result = await db.execute(
+            select(Quiz).where(Quiz.spot_id == spot_id, Quiz.difficulty == difficulty)
+        )
+        quizzes = result.scalars().all()
+        return random.choice(quizzes) if quizzes else None
+
+    async def store_quizzes(self, db: AsyncSession, rows: List[Dict[str, Any]]) -> List[Quiz]:
+        """
+        生成したクイズを1文で挿入する（コミットは呼び出し側）
+        同じ (spot_id, difficulty, question) が保存済みの行は読み飛ばし、挿入した行だけを返す
+        """
+        return await insert_ignore_conflicts(
+            db, Quiz, rows, conflict_columns=['spot_id', 'difficulty', 'question']
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": bool(self._workers),
+            "workers": len(self._workers),
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "pending": len(self._pending),
+            "retry_waiting": len(self._retry_tasks),
+            "enqueued": self.enqueued,
+            "deduplicated": self.deduplicated,
+            "dropped": self.dropped,
+            "generated": self.generated,
+            "retries": self.retries,
+            "failed": self.failed,
+        }
+
+quiz_pipeline = QuizPregenerationPipeline()
+
+def quiz_row(spot_id: str, spot_name: str, difficulty: str, quiz_data: Dict[str, Any]) -> Dict[str, Any]:
+    """生成したクイズを quizzes の1行分の値にする"""
+    return {
+        'spot_id': spot_id,
+        'spot_name': spot_name,
+        'question': quiz_data['question'],
+        'options': quiz_data['options'],
+        'correct_answer': quiz_data['correct_answer'],
+        'explanation': quiz_data['explanation'],
+        'difficulty': difficulty,
+        'points': quiz_data['points']
+    }
+
+def stored_quiz_dict(quiz: Quiz) -> Dict[str, Any]:
+    """保存済みクイズをAPIのクイズ形式に変換"""
+    return {
+        "id": quiz.id,
+        "spot_id": quiz.spot_id,
+        "question": quiz.question,
+        "options": quiz.options,
+        "correct_answer": quiz.correct_answer,
+        "explanation": quiz.explanation,
+        "difficulty": quiz.difficulty,
+        "points": quiz.points
+    }
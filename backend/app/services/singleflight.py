@@ -0,0 +1,68 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class SingleFlight:
+    """
+    同一キーの同時リクエストを1回の上流呼び出しにまとめる（プロセス内）
+    上流の例外・タイムアウトは、そのキーを待っている全員に同じものが伝わる
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[Any]],
+        timeout: Optional[float] = None
+    ) -> Any:
+        """
+        key が実行中なら、その結果を待つ。なければ fn() を開始して共有する
+        timeout は最初の呼び出し時のみ有効（未指定ならインスタンスの既定値）で、
+        超過すると上流呼び出しを打ち切り、全員に asyncio.TimeoutError を返す
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.calls += 1
+            timeout = self.timeout if timeout is None else timeout
+            # 呼び出し元がキャンセルされても、共有している他の待ち手には影響させない
+            task = asyncio.ensure_future(self._run(fn, timeout))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        return await asyncio.shield(task)
+
+    async def _run(self, fn: Callable[[], Awaitable[Any]], timeout: Optional[float]) -> Any:
+        try:
+            if timeout is None:
+                return await fn()
+            return await asyncio.wait_for(fn(), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 待ち手が全員キャンセル済みでも "exception was never retrieved" を出さない
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "inflight": len(self._inflight),
+        }
@@ -0,0 +1,129 @@
+import logging
+import math
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Tuple
+import numpy as np
+from sqlalchemy import select
+from app.db.database import AsyncSessionLocal
+from app.models.route import HistoricalSpot
+from app.services.geometry import EARTH_RADIUS_M, Coords, as_coords, point_to_polyline_m
+
+logger = logging.getLogger(__name__)
+
+METERS_PER_DEG_LAT = math.pi * EARTH_RADIUS_M / 180
+
+Cell = Tuple[int, int]
+
+# セル番号を1次元キーに詰めるための定数（|セル番号| < 2^24 なら衝突しない）
+_CELL_KEY_OFFSET = 1 << 24
+_CELL_KEY_BASE = 1 << 26
+
+class SpotIndex:
+    """
+    保存済み HistoricalSpot のグリッド空間インデックス（プロセス内）
+    緯度経度を cell_deg 四方のセルに分け、ルート近傍のセルだけを調べる
+    """
+
+    def __init__(self, cell_deg: float = 0.02):
+        self.cell_deg = cell_deg
+        self._cells: Dict[Cell, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+        self._cell_of: Dict[str, Cell] = {}
+
+    def __len__(self) -> int:
+        return len(self._cell_of)
+
+    def _cell(self, lat: float, lng: float) -> Cell:
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def add(self, spot: Dict[str, Any]) -> None:
+        place_id = spot['place_id']
+        old_cell = self._cell_of.get(place_id)
+        if old_cell is not None:
+            self._cells[old_cell].pop(place_id, None)
+
+        cell = self._cell(spot['lat'], spot['lng'])
+        self._cells[cell][place_id] = spot
+        self._cell_of[place_id] = cell
+
+    def add_many(self, spots: Iterable[Dict[str, Any]]) -> None:
+        for spot in spots:
+            self.add(spot)
+
+    async def load(self) -> None:
+        """起動時に historical_spots テーブル全体からインデックスを構築"""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(select(HistoricalSpot))
+            spots = result.scalars().all()
+
+        self._cells.clear()
+        self._cell_of.clear()
+        self.add_many(spot_to_dict(spot) for spot in spots)
+        logger.info(f"Spatial index loaded with {len(self)} historical spots")
+
+    def query_near(self, lat: float, lng: float, radius_m: float) -> List[Dict[str, Any]]:
+        """1地点から radius_m 以内のスポットを近い順に返す"""
+        return self.query_along_route([(lat, lng)], radius_m)
+
+    def query_along_route(
+        self,
+        route_coords: Coords,
+        radius_m: float
+    ) -> List[Dict[str, Any]]:
+        """ルート（デコード済みポリライン）から radius_m 以内のスポットを近い順に返す"""
+        line = as_coords(route_coords)
+        if len(line) == 0 or not self._cell_of:
+            return []
+
+        # ルートの各線分の外接矩形にかかるセル（ほとんどの線分は1〜2セルに収まる）
+        cells = np.floor(line / self.cell_deg).astype(np.int64)
+        lo = np.minimum(cells[:-1], cells[1:]) if len(cells) > 1 else cells
+        hi = np.maximum(cells[:-1], cells[1:]) if len(cells) > 1 else cells
+        route_cells = [lo, hi, np.column_stack([lo[:, 0], hi[:, 1]]), np.column_stack([hi[:, 0], lo[:, 1]])]
+        for k in np.flatnonzero(((hi - lo) > 1).any(axis=1)):
+            grid_i, grid_j = np.mgrid[lo[k, 0]:hi[k, 0] + 1, lo[k, 1]:hi[k, 1] + 1]
+            route_cells.append(np.column_stack([grid_i.ravel(), grid_j.ravel()]))
+        route_cells = _unique_cells(np.vstack(route_cells))
+
+        # 半径が何セル分に当たるかだけ広げたセル
+        max_lat = float(np.abs(line[:, 0]).max())
+        reach_lat = math.ceil(radius_m / METERS_PER_DEG_LAT / self.cell_deg)
+        reach_lng = math.ceil(
+            radius_m / (METERS_PER_DEG_LAT * max(math.cos(math.radians(max_lat)), 1e-6)) / self.cell_deg
+        )
+        offset_i, offset_j = np.mgrid[-reach_lat:reach_lat + 1, -reach_lng:reach_lng + 1]
+        offsets = np.column_stack([offset_i.ravel(), offset_j.ravel()])
+        nearby_cells = _unique_cells((route_cells[:, None, :] + offsets[None, :, :]).reshape(-1, 2))
+
+        # 近傍セルにある候補スポットだけ、ルート全体への距離をまとめて計算する
+        candidates: Dict[str, Dict[str, Any]] = {}
+        for cell in map(tuple, nearby_cells.tolist()):
+            spots = self._cells.get(cell)
+            if spots:
+                candidates.update(spots)
+        if not candidates:
+            return []
+
+        spots = list(candidates.values())
+        distances = point_to_polyline_m([(spot['lat'], spot['lng']) for spot in spots], line)
+        order = np.argsort(distances, kind="stable")
+        return [spots[k] for k in order if distances[k] <= radius_m]
+
+
+def _unique_cells(cells: np.ndarray) -> np.ndarray:
+    """セル座標の重複除去（1次元の整数キーに詰めてから unique する方が axis=0 より速い）"""
+    keys = np.unique((cells[:, 0] + _CELL_KEY_OFFSET) * _CELL_KEY_BASE + (cells[:, 1] + _CELL_KEY_OFFSET))
+    return np.column_stack([keys // _CELL_KEY_BASE - _CELL_KEY_OFFSET, keys % _CELL_KEY_BASE - _CELL_KEY_OFFSET])
+
+
+def spot_to_dict(spot: HistoricalSpot) -> Dict[str, Any]:
+    return {
+        'place_id': spot.place_id,
+        'name': spot.name,
+        'address': spot.address or '',
+        'lat': spot.lat,
+        'lng': spot.lng,
+        'types': spot.types or [],
+        'description': spot.description
+    }
+
+spot_index = SpotIndex()
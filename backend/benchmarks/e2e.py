@@ -0,0 +1,302 @@
+"""
+FastAPI バックエンドのエンドツーエンド・ベンチマーク
+
+main.app を一時ファイルの SQLite と代替バックエンド（UPSTREAM_BACKEND=fake）で
+同一プロセス内の uvicorn に載せ、検索・保存・履歴・クイズ回答・ランキング・ログインを
+同時実行数を上げながら計測する。各段階は閉ループ（各ワーカーが応答を受けてから次を送る）。
+
+結果は JSON で保存でき、保存済みのベースラインと比べて p50 レイテンシの悪化または
+スループットの低下が閾値を超えたシナリオがあれば終了コード 1 で終わる。
+ベースラインはマシンに依存するので、比較する環境で --save-baseline して作る。
+
+    cd backend && python -m benchmarks.e2e --save-baseline
+    cd backend && python -m benchmarks.e2e --output /tmp/e2e.json --threshold 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+import numpy as np
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_BASELINE = RESULTS_DIR / "e2e_baseline.json"
+SCENARIOS = ("search", "save", "history", "attempt", "ranking", "login")
+PASSWORD = "bench-password"
+PLACES = ("東京駅", "鎌倉駅", "横浜駅", "小田原駅", "浅草寺", "日光東照宮", "箱根湯本駅", "川越駅")
+
+
+def configure_environment(workdir: Path, maps_latency_ms: float, openai_latency_ms: float) -> None:
+    """app を import する前に、SQLite と代替バックエンドを使うよう環境変数を設定する"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'bench.db'}"
+    os.environ["UPSTREAM_BACKEND"] = "fake"
+    os.environ["FAKE_MAPS_LATENCY_MS"] = str(maps_latency_ms)
+    os.environ["FAKE_OPENAI_LATENCY_MS"] = str(openai_latency_ms)
+    os.environ.setdefault("FAKE_UPSTREAM_JITTER", "0.1")
+    os.environ.setdefault("FAKE_UPSTREAM_SEED", "1")
+
+
+class ServerThread:
+    """uvicorn を別スレッドで起動する（計測側のイベントループと分ける）"""
+
+    def __init__(self, app: Any) -> None:
+        import uvicorn
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "ServerThread":
+        self.thread.start()
+        deadline = time.monotonic() + 30
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise RuntimeError("server did not start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+class Bench:
+    def __init__(self, session: aiohttp.ClientSession, base_url: str) -> None:
+        self.session = session
+        self.base_url = base_url
+        self.users: List[Tuple[str, Dict[str, str]]] = []
+        self.routes: List[Dict[str, Any]] = []
+        self.quiz_ids: List[int] = []
+
+    async def request(self, method: str, path: str, **kwargs: Any) -> Any:
+        async with self.session.request(method, f"{self.base_url}{path}", **kwargs) as response:
+            body = await response.read()
+            if response.status >= 400:
+                raise RuntimeError(f"{method} {path} -> {response.status}: {body[:200]!r}")
+            return json.loads(body) if body else None
+
+    async def setup(self, user_count: int) -> None:
+        """計測用のユーザー・検索結果・クイズを用意する"""
+        for index in range(user_count):
+            name = f"bench_{index}"
+            await self.request("POST", "/api/v1/auth/register", json={
+                "username": name, "email": f"{name}@example.com", "password": PASSWORD
+            })
+            token = await self.request("POST", "/api/v1/auth/login", data={"username": name, "password": PASSWORD})
+            self.users.append((name, {"Authorization": f"Bearer {token['access_token']}"}))
+
+        headers = self.users[0][1]
+        for origin, destination in zip(PLACES, PLACES[1:] + PLACES[:1]):
+            result = await self.request("POST", "/api/v1/routes/search", headers=headers, json={
+                "origin": origin, "destination": destination
+            })
+            # フロントエンドと同じく、検索結果のルートにスポットを付けて保存する
+            route = {**result["route"], "historical_spots": result["historical_spots"]}
+            self.routes.append(route)
+            await self.request("POST", "/api/v1/routes/save", headers=headers, json=route)
+
+        for index in range(20):
+            quiz = await self.request("POST", "/api/v1/quizzes/save", headers=headers, json={
+                "spot_id": f"bench_spot_{index}",
+                "spot_name": f"ベンチ用スポット{index}",
+                "question": f"ベンチ用の問題{index}",
+                "options": ["A", "B", "C", "D"],
+                "correct_answer": index % 4,
+                "explanation": "ベンチ用",
+                "difficulty": "中学生",
+                "points": 10,
+            })
+            self.quiz_ids.append(quiz["id"])
+
+    def scenario(self, name: str) -> Callable[[], Awaitable[Any]]:
+        def user() -> Tuple[str, Dict[str, str]]:
+            return random.choice(self.users)
+
+        if name == "search":
+            def run():
+                origin, destination = random.sample(PLACES, 2)
+                return self.request("POST", "/api/v1/routes/search", headers=user()[1], json={
+                    "origin": origin, "destination": destination
+                })
+        elif name == "save":
+            def run():
+                return self.request("POST", "/api/v1/routes/save", headers=user()[1], json=random.choice(self.routes))
+        elif name == "history":
+            def run():
+                return self.request("GET", "/api/v1/routes/history", headers=user()[1])
+        elif name == "attempt":
+            def run():
+                return self.request("POST", "/api/v1/quizzes/attempt", headers=user()[1], json={
+                    "quiz_id": random.choice(self.quiz_ids), "selected_answer": random.randrange(4)
+                })
+        elif name == "ranking":
+            def run():
+                return self.request("GET", "/api/v1/users/ranking")
+        elif name == "login":
+            def run():
+                return self.request("POST", "/api/v1/auth/login", data={"username": user()[0], "password": PASSWORD})
+        else:
+            raise ValueError(name)
+        return run
+
+    async def measure(self, name: str, concurrency: int, requests: int) -> Dict[str, Any]:
+        run = self.scenario(name)
+        latencies: List[float] = []
+        errors = 0
+        remaining = requests
+
+        async def worker() -> None:
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                try:
+                    await run()
+                except Exception:
+                    errors += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "throughput_rps": round((len(latencies) - errors) / elapsed, 2),
+            "latency_ms": {"p50": round(float(p50), 2), "p90": round(float(p90), 2), "p99": round(float(p99), 2)},
+        }
+
+
+async def run_suite(base_url: str, scenarios: List[str], levels: List[int], requests: int, users: int) -> Dict[str, Any]:
+    connector = aiohttp.TCPConnector(limit=max(levels) * 2)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        bench = Bench(session, base_url)
+        await bench.setup(users)
+        results: Dict[str, Dict[str, Any]] = {}
+        for name in scenarios:
+            results[name] = {}
+            for concurrency in levels:
+                # ログインは bcrypt が重いので件数を減らす
+                count = max(concurrency, requests // 4) if name == "login" else max(concurrency, requests)
+                results[name][str(concurrency)] = await bench.measure(name, concurrency, count)
+                stats = results[name][str(concurrency)]
+                print(
+                    f"{name:<9}c={concurrency:<4}{stats['throughput_rps']:>9.1f} rps"
+                    f"  p50 {stats['latency_ms']['p50']:>8.1f} ms  p99 {stats['latency_ms']['p99']:>8.1f} ms"
+                    f"  errors {stats['errors']}",
+                    flush=True
+                )
+        return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """ベースラインより p50 が threshold 超悪化、またはスループットが threshold 超低下したものを返す"""
+    regressions = []
+    print(f"\n{'scenario':<10}{'c':>5}{'p50 Δ':>10}{'rps Δ':>10}")
+    for name, levels in results["results"].items():
+        for concurrency, stats in levels.items():
+            base = baseline.get("results", {}).get(name, {}).get(concurrency)
+            if not base:
+                continue
+            p50_change = stats["latency_ms"]["p50"] / max(base["latency_ms"]["p50"], 1e-9) - 1
+            rps_change = stats["throughput_rps"] / max(base["throughput_rps"], 1e-9) - 1
+            flag = ""
+            if p50_change > threshold or rps_change < -threshold:
+                flag = "  REGRESSION"
+                regressions.append(f"{name} c={concurrency}")
+            print(f"{name:<10}{concurrency:>5}{p50_change:>+10.1%}{rps_change:>+10.1%}{flag}")
+    return regressions
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,4,16,64", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario and level")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--maps-latency-ms", type=float, default=20)
+    parser.add_argument("--openai-latency-ms", type=float, default=100)
+    parser.add_argument("--output", type=Path, help="write the results JSON here")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    scenarios = [name for name in args.scenarios.split(",") if name]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_environment(Path(workdir), args.maps_latency_ms, args.openai_latency_ms)
+        from main import app
+        from app.db.database import engine
+
+        # SQLログの出力そのものが計測を歪めるので止める
+        engine.sync_engine.echo = False
+
+        with ServerThread(app) as server:
+            results = asyncio.run(run_suite(server.base_url, scenarios, levels, args.requests, args.users))
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "concurrency": levels,
+            "maps_latency_ms": args.maps_latency_ms,
+            "openai_latency_ms": args.openai_latency_ms,
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"\nbaseline saved to {args.baseline}")
+        return
+
+    if args.baseline.exists():
+        regressions = compare(report, json.loads(args.baseline.read_text(encoding="utf-8")), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nno regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+GoogleMapsService の同時実行ロードテスト
+
+googlemaps.Client の各メソッドを一定時間スリープする偽物に差し替え、
+同時に投げたルート検索が直列化されないこと（＝イベントループを塞がないこと）を確認する。
+ジオコーディング・ルートのDBキャッシュは一時ファイルの SQLite に向ける。
+
+    cd backend && python -m benchmarks.google_maps_concurrency --searches 20 --latency-ms 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+CALLS_PER_SEARCH = 3  # geocode x2 + directions
+
+
+def configure_environment(workdir: Path) -> None:
+    """app を import する前に、一時ファイルの SQLite とダミーキーを使うよう環境変数を設定する"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'bench.db'}"
+    # googlemaps.Client はキー形式を検証するため、ダミーキーで初期化する
+    os.environ.setdefault("GOOGLE_MAPS_API_KEY", "AIzaBenchmarkDummyKey")
+
+
+async def create_tables() -> None:
+    from app.db.database import Base, engine
+    from app.db.migrations import run_migrations
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await run_migrations(conn)
+
+
+def _install_fake_client(service, latency: float) -> None:
+    location = {"lat": 35.6812, "lng": 139.7671}
+
+    def geocode(address, **kwargs):
+        time.sleep(latency)
+        return [{"geometry": {"location": location}}]
+
+    def directions(origin, destination, **kwargs):
+        time.sleep(latency)
+        return [{
+            "legs": [{
+                "distance": {"text": "55.2 km"},
+                "duration": {"text": "1時間 15分"},
+                "steps": []
+            }],
+            "overview_polyline": {"points": "o}jaEucanQKqAMcAQeAOmABG{@sAUc@"}
+        }]
+
+    service.client.geocode = geocode
+    service.client.directions = directions
+
+
+async def _heartbeat(stop: asyncio.Event, interval: float, lags: list) -> None:
+    """イベントループの遅延（ブロッキング時間）を計測する"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+
+
+async def run(searches: int, latency: float) -> dict:
+    from app.db.database import engine
+    from app.services.google_maps import GoogleMapsService
+
+    await create_tables()
+    service = GoogleMapsService()
+    _install_fake_client(service, latency)
+
+    stop = asyncio.Event()
+    lags: list = []
+    heartbeat = asyncio.create_task(_heartbeat(stop, 0.01, lags))
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        service.search_route(f"origin-{i}", f"destination-{i}")
+        for i in range(searches)
+    ])
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await heartbeat
+    service.shutdown()
+    await engine.dispose()
+
+    serialized = searches * CALLS_PER_SEARCH * latency
+    return {
+        "searches": searches,
+        "succeeded": sum(1 for r in results if r),
+        "elapsed_s": elapsed,
+        "serialized_estimate_s": serialized,
+        "speedup": serialized / elapsed,
+        "max_loop_lag_ms": max(lags, default=0.0) * 1000,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--searches", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--min-speedup", type=float, default=2.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_environment(Path(workdir))
+        result = asyncio.run(run(args.searches, args.latency_ms / 1000))
+    for key, value in result.items():
+        print(f"{key:>24}: {value:.3f}" if isinstance(value, float) else f"{key:>24}: {value}")
+
+    if result["speedup"] < args.min_speedup:
+        print("FAIL: concurrent searches are still serialized")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+回答履歴のページング比較（OFFSET / キーセット）
+
+一時 SQLite に quiz_attempts を100万行入れ（1ユーザーに半分を集中させる）、
+GET /quizzes/history と同じクエリで、浅いページから深いページまでの取得時間を測る。
+OFFSET は読み飛ばす行数に比例して遅くなり、キーセット（X-Next-Cursor）は深さによらず一定になる。
+
+    cd backend && python -m benchmarks.history_pagination
+    cd backend && python -m benchmarks.history_pagination --rows 200000 --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.pagination import newest_first
+from app.db.database import Base, build_engine
+from app.models import QuizAttempt
+
+PAGE_SIZE = 20
+HEAVY_USER_ID = 1
+
+
+def seed(path: Path, rows: int, users: int, heavy_share: float) -> int:
+    """行を直接挿入し、集中させたユーザーの行数を返す（同じ秒に複数行が入るよう時刻を刻む）"""
+    started = datetime(2024, 1, 1)
+    con = sqlite3.connect(path)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=OFF")
+
+    def generate():
+        for index in range(rows):
+            # heavy_share の割合で集中ユーザーの行を均等に混ぜる
+            heavy = int((index + 1) * heavy_share) > int(index * heavy_share)
+            user_id = HEAVY_USER_ID if heavy else 2 + index % (users - 1)
+            yield (user_id, 1, index % 4, index % 4 == 0, 10 if index % 4 == 0 else 0,
+                   (started + timedelta(seconds=index // 3)).strftime("%Y-%m-%d %H:%M:%S"))
+
+    con.executemany(
+        "INSERT INTO quiz_attempts (user_id, quiz_id, selected_answer, is_correct, points_earned, attempted_at) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        generate()
+    )
+    con.commit()
+    count = con.execute("SELECT COUNT(*) FROM quiz_attempts WHERE user_id = ?", (HEAVY_USER_ID,)).fetchone()[0]
+    con.execute("ANALYZE")
+    con.close()
+    return count
+
+
+def history_query(after_id: Optional[int] = None, skip: int = 0):
+    """エンドポイントと同じクエリ"""
+    query = newest_first(
+        select(QuizAttempt).where(QuizAttempt.user_id == HEAVY_USER_ID),
+        QuizAttempt,
+        QuizAttempt.attempted_at,
+        after_id
+    )
+    return query.offset(skip).limit(PAGE_SIZE + 1)
+
+
+async def timed(engine: AsyncEngine, query: Any, repeat: int) -> float:
+    samples = []
+    async with engine.connect() as conn:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            (await conn.execute(query)).all()
+            samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def run(args: argparse.Namespace, workdir: Path) -> Dict[str, Any]:
+    path = workdir / "history.db"
+    engine = build_engine(f"sqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    if args.no_index:
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP INDEX ix_quiz_attempts_user_attempted"))
+
+    started = time.perf_counter()
+    heavy_rows = seed(path, args.rows, args.users, args.heavy_share)
+    print(f"seeded {args.rows} attempts ({heavy_rows} for one user) in {time.perf_counter() - started:.1f} s")
+
+    async with engine.connect() as conn:
+        plan = (await conn.execute(text("EXPLAIN QUERY PLAN " + str(
+            history_query(after_id=1).compile(engine.sync_engine, compile_kwargs={"literal_binds": True})
+        )))).all()
+    print("keyset plan: " + " / ".join(row[-1] for row in plan) + "\n")
+
+    results = []
+    last_page = heavy_rows // PAGE_SIZE - 1
+    depths = sorted({depth for depth in (0, 10, 100, 1000, 10000, last_page) if depth <= last_page})
+    print(f"{'page':>8}{'offset ms':>12}{'keyset ms':>12}")
+    for depth in depths:
+        skip = depth * PAGE_SIZE
+        after_id = None
+        if depth:
+            async with engine.connect() as conn:
+                # 前ページ最後の行（計測外）
+                after_id = (await conn.execute(history_query(skip=skip - 1).limit(1))).one().id
+        offset_ms = await timed(engine, history_query(skip=skip), args.repeat)
+        keyset_ms = await timed(engine, history_query(after_id=after_id), args.repeat)
+        results.append({"page": depth, "offset_ms": round(offset_ms, 3), "keyset_ms": round(keyset_ms, 3)})
+        print(f"{depth:>8}{offset_ms:>12.2f}{keyset_ms:>12.2f}")
+
+    await engine.dispose()
+    return {"rows": args.rows, "heavy_user_rows": heavy_rows, "index": not args.no_index, "pages": results}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--heavy-share", type=float, default=0.5, help="share of rows owned by one user")
+    parser.add_argument("--repeat", type=int, default=10, help="timed runs per query (median is reported)")
+    parser.add_argument("--no-index", action="store_true", help="drop the (user_id, attempted_at, id) index first")
+    parser.add_argument("--json", type=Path, help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        result = asyncio.run(run(args, Path(workdir)))
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+負荷生成ハーネス（/routes/search と /quizzes/generate-ai を目標RPSで叩く）
+
+開ループ方式: 応答を待たずに一定間隔でリクエストを発行するので、サーバーが詰まると
+待ち行列ぶんのレイテンシがそのまま結果に出る。シナリオごとにスループットと
+レイテンシのパーセンタイルを表示する（--json で機械可読な結果も保存）。
+
+APIの利用枠を使わないよう、サーバーは代替バックエンドで起動しておく:
+
+    cd backend && UPSTREAM_BACKEND=fake uvicorn main:app --port 8000
+    cd backend && python -m benchmarks.loadgen --rps 20 --duration 30 --mix search=1,quiz=3
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+import numpy as np
+
+FIXTURES = Path(__file__).parent / "fixtures" / "upstreams.json"
+DIFFICULTIES = ("小学生", "中学生", "高校生")
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    def add(self, scenario: str, latency_s: float, status: str) -> None:
+        self.latencies[scenario].append(latency_s * 1000)
+        self.statuses[scenario][status] += 1
+
+    def summary(self, elapsed_s: float) -> Dict[str, Any]:
+        result = {}
+        for scenario, latencies in sorted(self.latencies.items()):
+            values = np.asarray(latencies)
+            statuses = self.statuses[scenario]
+            ok = sum(count for status, count in statuses.items() if status.startswith("2"))
+            p50, p90, p99 = np.percentile(values, [50, 90, 99])
+            result[scenario] = {
+                "requests": len(latencies),
+                "ok": ok,
+                "errors": len(latencies) - ok,
+                "throughput_rps": round(ok / elapsed_s, 2),
+                "latency_ms": {
+                    "p50": round(float(p50), 1),
+                    "p90": round(float(p90), 1),
+                    "p99": round(float(p99), 1),
+                    "max": round(float(values.max()), 1),
+                },
+                "statuses": dict(statuses),
+            }
+        return result
+
+
+class LoadGenerator:
+    def __init__(self, base_url: str, fixtures: Dict[str, Any], timeout: float) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.places = list(fixtures.get("geocode", {}))
+        self.spots = [place["name"] for place in fixtures.get("places", [])]
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.recorder = Recorder()
+        self.headers: Dict[str, str] = {}
+
+    async def login(self, session: aiohttp.ClientSession) -> None:
+        """検索は認証が必要なので、使い捨てのユーザーを作ってトークンを取る"""
+        name = f"load_{uuid.uuid4().hex[:10]}"
+        password = "load-test-password"
+        await session.post(f"{self.base_url}/api/v1/auth/register", json={
+            "username": name, "email": f"{name}@example.com", "password": password
+        })
+        async with session.post(
+            f"{self.base_url}/api/v1/auth/login",
+            data={"username": name, "password": password}
+        ) as response:
+            response.raise_for_status()
+            token = (await response.json())["access_token"]
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    def request_for(self, scenario: str) -> Tuple[str, str, Dict[str, Any]]:
+        if scenario == "search":
+            origin, destination = random.sample(self.places, 2)
+            return "POST", "/api/v1/routes/search", {
+                "json": {"origin": origin, "destination": destination},
+                "headers": self.headers,
+            }
+        spot = random.choice(self.spots)
+        return "POST", "/api/v1/quizzes/generate-ai", {
+            "params": {
+                "spot_name": spot,
+                "spot_description": f"{spot}は歴史的に重要な場所として知られています。",
+                "difficulty": random.choice(DIFFICULTIES),
+            }
+        }
+
+    async def fire(self, session: aiohttp.ClientSession, scenario: str) -> None:
+        method, path, kwargs = self.request_for(scenario)
+        started = time.perf_counter()
+        try:
+            async with session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs) as response:
+                await response.read()
+                status = str(response.status)
+        except asyncio.TimeoutError:
+            status = "timeout"
+        except aiohttp.ClientError as e:
+            status = type(e).__name__
+        self.recorder.add(scenario, time.perf_counter() - started, status)
+
+    async def run(self, rps: float, duration: float, mix: Dict[str, float], max_in_flight: int) -> Dict[str, Any]:
+        scenarios, weights = zip(*mix.items())
+        connector = aiohttp.TCPConnector(limit=max_in_flight)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            if "search" in mix:
+                await self.login(session)
+
+            tasks = []
+            interval = 1 / rps
+            started = time.perf_counter()
+            for index in range(int(rps * duration)):
+                # 予定時刻に発行する（遅れても詰めて発行し、平均レートを保つ）
+                delay = started + index * interval - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                scenario = random.choices(scenarios, weights)[0]
+                tasks.append(asyncio.create_task(self.fire(session, scenario)))
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - started
+
+        return {
+            "target_rps": rps,
+            "duration_s": round(elapsed, 2),
+            "scenarios": self.recorder.summary(elapsed),
+        }
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("search", "quiz"):
+            raise argparse.ArgumentTypeError(f"unknown scenario: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def print_summary(result: Dict[str, Any]) -> None:
+    print(f"target {result['target_rps']} rps, {result['duration_s']} s\n")
+    print(f"{'scenario':<10}{'reqs':>7}{'errors':>8}{'ok rps':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+    for scenario, stats in result["scenarios"].items():
+        latency = stats["latency_ms"]
+        print(
+            f"{scenario:<10}{stats['requests']:>7}{stats['errors']:>8}{stats['throughput_rps']:>9.2f}"
+            f"{latency['p50']:>9.1f}{latency['p90']:>9.1f}{latency['p99']:>9.1f}{latency['max']:>9.1f}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--rps", type=float, default=10)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("search=1,quiz=3"))
+    parser.add_argument("--max-in-flight", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=30, help="per-request timeout in seconds")
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES)
+    parser.add_argument("--json", type=Path, help="write the results to this file")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    fixtures = json.loads(args.fixtures.read_text(encoding="utf-8"))
+    generator = LoadGenerator(args.base_url, fixtures, args.timeout)
+    result = asyncio.run(generator.run(args.rps, args.duration, args.mix, args.max_in_flight))
+
+    print_summary(result)
+    if args.json:
+        args.json.write_text(json.dumps(result, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
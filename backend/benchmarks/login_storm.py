@@ -0,0 +1,152 @@
+"""
+ログイン集中時のベンチマーク（bcrypt の計算がほかのエンドポイントを止めないか）
+
+main.app を e2e と同じく一時 SQLite・代替バックエンドで同一プロセス内に起動し、
+ログインを並行して送り続けながら、無関係なエンドポイント（GET /users/ranking）の
+レイテンシを測る。bcrypt をイベントループ上で直接実行していた旧実装（inline）と、
+専用スレッドプールに逃がす現実装（offload）を同じサーバーで切り替えて比べる。
+
+    cd backend && python -m benchmarks.login_storm
+    cd backend && python -m benchmarks.login_storm --login-workers 64 --duration 15 --rounds 12
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+import numpy as np
+
+from benchmarks.e2e import PASSWORD, ServerThread, configure_environment
+
+MODES = ("baseline", "inline", "offload")
+
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    p50, p99 = np.percentile(latencies or [0.0], [50, 99])
+    return {"p50": round(float(p50), 1), "p99": round(float(p99), 1)}
+
+
+async def loop_requests(
+    session: aiohttp.ClientSession,
+    method: str,
+    url: str,
+    deadline: float,
+    latencies: List[float],
+    statuses: Counter,
+    **kwargs: Any
+) -> None:
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        async with session.request(method, url, **kwargs) as response:
+            await response.read()
+            statuses[response.status] += 1
+            if response.status == 503:
+                # Retry-After に従う代わりに少しだけ間を空ける
+                await asyncio.sleep(0.05)
+                continue
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def storm(base_url: str, users: List[str], login_workers: int, probe_workers: int, duration: float) -> Dict[str, Any]:
+    login_latencies: List[float] = []
+    probe_latencies: List[float] = []
+    login_statuses: Counter = Counter()
+    probe_statuses: Counter = Counter()
+    connector = aiohttp.TCPConnector(limit=login_workers + probe_workers + 4)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(
+            *(
+                loop_requests(
+                    session, "POST", f"{base_url}/api/v1/auth/login", deadline, login_latencies, login_statuses,
+                    data={"username": users[index % len(users)], "password": PASSWORD}
+                )
+                for index in range(login_workers)
+            ),
+            *(
+                loop_requests(session, "GET", f"{base_url}/api/v1/users/ranking", deadline, probe_latencies, probe_statuses)
+                for _ in range(probe_workers)
+            ),
+        )
+    return {
+        "login": {
+            "ok_rps": round(login_statuses[200] / duration, 1),
+            "latency_ms": percentiles(login_latencies),
+            "statuses": {str(code): count for code, count in login_statuses.items()},
+        },
+        "probe": {
+            "rps": round(len(probe_latencies) / duration, 1),
+            "latency_ms": percentiles(probe_latencies),
+            "statuses": {str(code): count for code, count in probe_statuses.items()},
+        },
+    }
+
+
+async def register_users(base_url: str, count: int) -> List[str]:
+    names = [f"storm_{index}" for index in range(count)]
+    async with aiohttp.ClientSession() as session:
+        for name in names:
+            async with session.post(f"{base_url}/api/v1/auth/register", json={
+                "username": name, "email": f"{name}@example.com", "password": PASSWORD
+            }) as response:
+                response.raise_for_status()
+    return names
+
+
+def run_inline(hasher: Any) -> None:
+    """旧実装の再現: ハッシュ計算をイベントループ上でそのまま実行する"""
+    async def inline(func, *args):
+        return func(*args)
+    hasher._run = inline
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--login-workers", type=int, default=32)
+    parser.add_argument("--probe-workers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10, help="seconds per mode")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=12, help="BCRYPT_ROUNDS for the server")
+    parser.add_argument("--json", type=Path, help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_environment(Path(workdir), maps_latency_ms=0, openai_latency_ms=0)
+        os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+        from main import app
+        from app.core.security import password_hasher
+
+        with ServerThread(app) as server:
+            users = asyncio.run(register_users(server.base_url, args.users))
+            for mode in MODES:
+                if mode == "inline":
+                    run_inline(password_hasher)
+                elif mode == "offload":
+                    del password_hasher._run
+                login_workers = 0 if mode == "baseline" else args.login_workers
+                results[mode] = asyncio.run(storm(
+                    server.base_url, users, login_workers, args.probe_workers, args.duration
+                ))
+            results["hasher"] = password_hasher.stats()
+
+    print(f"bcrypt rounds {args.rounds}, {args.login_workers} login workers, {args.probe_workers} probe workers\n")
+    print(f"{'mode':<10}{'login ok/s':>11}{'login p50':>11}{'login p99':>11}{'503s':>7}{'probe p50':>11}{'probe p99':>11}")
+    for mode in MODES:
+        login, probe = results[mode]["login"], results[mode]["probe"]
+        print(
+            f"{mode:<10}{login['ok_rps']:>11.1f}{login['latency_ms']['p50']:>11.1f}{login['latency_ms']['p99']:>11.1f}"
+            f"{login['statuses'].get('503', 0):>7}{probe['latency_ms']['p50']:>11.1f}{probe['latency_ms']['p99']:>11.1f}"
+        )
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+ポリラインのデコード/エンコードと距離計算のマイクロベンチマーク
+
+長距離ルート（数千〜数十万頂点）で、pure Python の polyline パッケージと
+app.services.geometry の NumPy 実装を比較する。
+
+    cd backend && python -m benchmarks.polyline_codec --repeat 5
+"""
+import argparse
+import math
+import random
+import timeit
+from typing import Callable, List, Tuple
+
+import polyline as polyline_lib
+
+from app.services.geometry import cumulative_distance_m, decode_polyline, encode_polyline
+
+# 頂点数: 都市間(東京→名古屋) / 長距離(東京→福岡) / 縦断(札幌→鹿児島、詳細ポリライン)
+ROUTE_SIZES = {
+    "tokyo-nagoya": 5_000,
+    "tokyo-fukuoka": 40_000,
+    "sapporo-kagoshima": 200_000,
+}
+
+
+def synthetic_route(vertices: int, seed: int = 0) -> List[Tuple[float, float]]:
+    rng = random.Random(seed)
+    lat, lng = 43.0621, 141.3544
+    coords = []
+    for _ in range(vertices):
+        lat -= rng.uniform(0.0, 0.0002)
+        lng -= rng.uniform(-0.0001, 0.0003)
+        coords.append((lat, lng))
+    return coords
+
+
+def python_route_length_m(coords: List[Tuple[float, float]]) -> float:
+    total = 0.0
+    for (lat1, lng1), (lat2, lng2) in zip(coords, coords[1:]):
+        p1, p2 = math.radians(lat1), math.radians(lat2)
+        a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2
+        total += 2 * 6371008.8 * math.asin(math.sqrt(a))
+    return total
+
+
+def best_ms(func: Callable[[], object], repeat: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'route':<20}{'vertices':>10}{'operation':>14}{'polyline':>12}{'numpy':>10}{'speedup':>9}")
+    for name, size in ROUTE_SIZES.items():
+        coords = synthetic_route(size)
+        encoded = polyline_lib.encode(coords)
+        assert encode_polyline(coords) == encoded
+
+        cases = {
+            "decode": (lambda: polyline_lib.decode(encoded), lambda: decode_polyline(encoded)),
+            "encode": (lambda: polyline_lib.encode(coords), lambda: encode_polyline(coords)),
+            "decode+length": (
+                lambda: python_route_length_m(polyline_lib.decode(encoded)),
+                lambda: cumulative_distance_m(decode_polyline(encoded))[-1],
+            ),
+        }
+        for operation, (baseline, vectorized) in cases.items():
+            before = best_ms(baseline, args.repeat)
+            after = best_ms(vectorized, args.repeat)
+            print(f"{name:<20}{size:>10}{operation:>14}{before:>10.2f}ms{after:>8.2f}ms{before / after:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
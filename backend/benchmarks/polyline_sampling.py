@@ -0,0 +1,82 @@
+"""
+ルート上のサンプリング方式の比較（旧: 頂点インデックス間引き / 新: 道のり一定間隔）
+
+都市部は頂点が密、高速道路区間は疎という実際のポリラインに近い合成ルートで、
+Places 検索の呼び出し数（km あたり）と、検索円がルートを覆う割合を比べる。
+
+    cd backend && python -m benchmarks.polyline_sampling --radius 5000 --points 5
+"""
+import argparse
+import math
+from typing import List, Tuple
+
+import numpy as np
+
+from app.services.geometry import (
+    cumulative_distance_m,
+    haversine_m,
+    resample_by_distance,
+    sample_points_for_search,
+)
+
+
+def _walk(start: Tuple[float, float], bearing_deg: float, step_m: float, count: int) -> List[Tuple[float, float]]:
+    lat, lng = start
+    points = []
+    for _ in range(count):
+        lat += step_m * math.cos(math.radians(bearing_deg)) / 111195
+        lng += step_m * math.sin(math.radians(bearing_deg)) / (111195 * math.cos(math.radians(lat)))
+        points.append((lat, lng))
+    return points
+
+
+def synthetic_route() -> List[Tuple[float, float]]:
+    """都市部15km(40m間隔) → 高速道路300km(3km間隔) → 都市部15km(40m間隔)"""
+    route = [(35.6812, 139.7671)]
+    route += _walk(route[-1], 240, 40, 375)
+    route += _walk(route[-1], 255, 3000, 100)
+    route += _walk(route[-1], 240, 40, 375)
+    return route
+
+
+def stride_samples(route: List[Tuple[float, float]], num_points: int) -> List[Tuple[float, float]]:
+    """旧方式: route_coords[::len//(n+1)][:n]"""
+    sample_interval = max(1, len(route) // (num_points + 1))
+    return route[::sample_interval][:num_points]
+
+
+def coverage(route: List[Tuple[float, float]], samples: List[Tuple[float, float]], radius_m: float) -> float:
+    """ルートを100m間隔にした点のうち、いずれかの検索円に入る割合"""
+    dense = resample_by_distance(route, 100)
+    points = np.asarray(samples, dtype=np.float64)
+    distances = haversine_m(dense[:, None, 0], dense[:, None, 1], points[None, :, 0], points[None, :, 1])
+    return float(np.mean(distances.min(axis=1) <= radius_m))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--radius", type=float, default=5000)
+    parser.add_argument("--points", type=int, default=5)
+    args = parser.parse_args()
+
+    route = synthetic_route()
+    length_km = cumulative_distance_m(route)[-1] / 1000
+    print(f"route: {len(route)} vertices, {length_km:.1f} km, radius {args.radius:.0f} m\n")
+
+    methods = {
+        f"stride (n={args.points})": stride_samples(route, args.points),
+        f"distance (max {args.points})": sample_points_for_search(route, args.radius, max_points=args.points),
+        "distance (uncapped)": sample_points_for_search(route, args.radius),
+    }
+
+    print(f"{'method':<22}{'calls':>7}{'calls/km':>10}{'coverage':>10}{'km/call covered':>17}")
+    for name, samples in methods.items():
+        covered = coverage(route, samples, args.radius)
+        print(
+            f"{name:<22}{len(samples):>7}{len(samples) / length_km:>10.3f}"
+            f"{covered:>10.1%}{covered * length_km / len(samples):>17.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+クイズ出力形式の比較（旧: 行形式 + 前方一致パース / 新: JSON + 検証 + 出し直し）
+
+補完結果（benchmarks/fixtures/quiz_completions.json）を両方のパーサーに通し、
+パース失敗率と、使えるクイズ1問あたりのトークン数を比べる。API呼び出しは行わない。
+旧方式の失敗はフォールバック値で黙って埋められた回答、新方式の失敗は検証エラーとして数える。
+
+同梱の fixtures は手書きの合成データ（meta.source = "synthetic"）で、各パーサーが
+どの形式で失敗するかを確かめるためのもの。失敗率・トークン数は実際のモデルの挙動を表さない。
+
+    cd backend && python -m benchmarks.quiz_output_modes
+
+実際のAPIの回答を記録し直すときは OPENAI_API_KEY を設定して --record を付ける
+（fixtures のスポットごとに両形式で1回ずつ呼び出し、--fixtures のファイルを meta.source = "recorded" で上書きする）。
+
+    cd backend && python -m benchmarks.quiz_output_modes --record
+"""
+import argparse
+import asyncio
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+from app.services.openai_service import (
+    DIFFICULTY_POINTS,
+    _is_complete_quiz_text,
+    _usage_of,
+    openai_service,
+)
+
+FIXTURES = Path(__file__).parent / "fixtures" / "quiz_completions.json"
+
+
+def evaluate_text(records: List[Dict[str, Any]]) -> Dict[str, float]:
+    failures = sum(not _is_complete_quiz_text(record["content"]) for record in records)
+    tokens = sum(record["usage"]["total_tokens"] for record in records)
+    return summarize(len(records), failures, failures, tokens)
+
+
+def evaluate_json(records: List[Dict[str, Any]]) -> Dict[str, float]:
+    first_failures = 0
+    failures = 0
+    tokens = 0
+    for record in records:
+        points = DIFFICULTY_POINTS.get(record["difficulty"], 15)
+        attempts = [record] + ([record["repair"]] if "repair" in record else [])
+        for attempt, completion in enumerate(attempts):
+            tokens += completion["usage"]["total_tokens"]
+            try:
+                openai_service._parse_json_quiz(completion["content"], points)
+                break
+            except ValueError:
+                if attempt == 0:
+                    first_failures += 1
+        else:
+            failures += 1
+    return summarize(len(records), first_failures, failures, tokens)
+
+
+def summarize(count: int, first_failures: int, failures: int, tokens: int) -> Dict[str, float]:
+    usable = count - failures
+    return {
+        "completions": count,
+        "first_failure_rate": first_failures / count if count else 0.0,
+        "failure_rate": failures / count if count else 0.0,
+        "tokens_per_quiz": tokens / usable if usable else float("inf"),
+    }
+
+
+async def record(records: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+    """fixtures のスポットについて、両形式の回答を実際のAPIで取り直す"""
+    if not openai_service.client:
+        raise SystemExit("OPENAI_API_KEY is not set")
+
+    recorded: Dict[str, List[Dict[str, Any]]] = {"text": [], "json": []}
+    for spot in records["text"]:
+        args = (spot["spot_name"], spot["spot_description"], spot["difficulty"])
+        for mode, prompt, extra in (
+            ("text", openai_service._build_prompt(*args), {}),
+            ("json", openai_service._build_json_prompt(*args), {"response_format": {"type": "json_object"}}),
+        ):
+            response = await openai_service._complete(prompt, openai_service.max_tokens, **extra)
+            entry = {
+                "spot_name": spot["spot_name"],
+                "spot_description": spot["spot_description"],
+                "difficulty": spot["difficulty"],
+                "content": response.choices[0].message.content,
+                "usage": _usage_of(response),
+            }
+            if mode == "json":
+                try:
+                    openai_service._parse_json_quiz(entry["content"], DIFFICULTY_POINTS.get(spot["difficulty"], 15))
+                except ValueError as e:
+                    # 本番と同じく、エラー内容を添えて1回だけ出し直させた結果も残す
+                    repair = await openai_service._complete(
+                        f"形式エラー: {e}。同じ形式のJSONのみで出し直してください。",
+                        openai_service.max_tokens,
+                        history=[
+                            {"role": "user", "content": prompt},
+                            {"role": "assistant", "content": entry["content"] or ""},
+                        ],
+                        **extra
+                    )
+                    entry["repair"] = {"content": repair.choices[0].message.content, "usage": _usage_of(repair)}
+            recorded[mode].append(entry)
+    return recorded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES)
+    parser.add_argument("--record", action="store_true", help="re-record completions from the live API")
+    args = parser.parse_args()
+
+    records = json.loads(args.fixtures.read_text(encoding="utf-8"))
+    if args.record:
+        records = {
+            "meta": {
+                "source": "recorded",
+                "model": openai_service.model,
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+            },
+            **asyncio.run(record(records)),
+        }
+        args.fixtures.write_text(json.dumps(records, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"recorded {len(records['text'])} completions per mode to {args.fixtures}\n")
+
+    meta = records.get("meta", {})
+    if meta.get("source") != "recorded":
+        print("NOTE: synthetic fixtures (hand-written examples, not model output); "
+              "failure rates only show which formats each parser rejects. Re-record with --record.\n")
+    else:
+        print(f"recorded from {meta.get('model')} at {meta.get('recorded_at')}\n")
+
+    results = {
+        "text (line parse)": evaluate_text(records["text"]),
+        "json (validated + repair)": evaluate_json(records["json"]),
+    }
+
+    print(f"{'mode':<28}{'n':>4}{'1st-pass fail':>15}{'final fail':>12}{'tokens/quiz':>13}")
+    for name, result in results.items():
+        print(
+            f"{name:<28}{result['completions']:>4}{result['first_failure_rate']:>15.1%}"
+            f"{result['failure_rate']:>12.1%}{result['tokens_per_quiz']:>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,20 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import os
 from dotenv import load_dotenv
 
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.security import PasswordHasherBusy, password_hasher
 from app.db.database import engine, Base
+from app.db.migrations import run_migrations
+from app.services.google_maps import google_maps_service
+from app.services.spatial_index import spot_index
+from app.services.leaderboard import leaderboard
+from app.services.quiz_pipeline import quiz_pipeline
+from app.services.llm_telemetry import llm_telemetry
 
 load_dotenv()
 
@@ -19,6 +28,27 @@ app = FastAPI(
 async def startup_event():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await run_migrations(conn)
+    await spot_index.load()
+    await leaderboard.load()
+    await llm_telemetry.start()
+    quiz_pipeline.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await quiz_pipeline.stop()
+    await llm_telemetry.stop()
+    google_maps_service.shutdown()
+    password_hasher.shutdown()
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    # ログイン集中時はイベントループを守るため、待たせずに再試行を促す
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many concurrent password operations, please retry"},
+        headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER)},
+    )
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,6 +56,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 app.include_router(api_router, prefix="/api/v1")
@@ -5,8 +5,8 @@ import googlemaps
 from datetime import datetime
 import os
 from dotenv import load_dotenv
-import polyline
 from historical_quiz import HistoricalQuizGenerator
+from backend_geometry import decode_polyline
 
 # 環境変数読み込み
 load_dotenv()
@@ -108,7 +108,7 @@ if st.button("🔍 ルート検索", type="primary"):
                         
                         # ルートを描画
                         route_polyline = route['overview_polyline']['points']
-                        route_coords = polyline.decode(route_polyline)
+                        route_coords = decode_polyline(route_polyline).tolist()
                         
                         folium.PolyLine(
                             route_coords,
@@ -0,0 +1,16 @@
+# backend_geometry.py
+"""
+backend/app/services/geometry.py をファイルパスから読み込む
+このディレクトリの app.py と名前が衝突するので、backend の app パッケージとしては import しない
+"""
+import importlib.util
+from pathlib import Path
+
+_GEOMETRY_PATH = Path(__file__).resolve().parent.parent / "backend" / "app" / "services" / "geometry.py"
+
+_spec = importlib.util.spec_from_file_location("famoly_backend_geometry", _GEOMETRY_PATH)
+geometry = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(geometry)
+
+decode_polyline = geometry.decode_polyline
+sample_points_for_search = geometry.sample_points_for_search
@@ -4,6 +4,7 @@ import random
 import requests
 from typing import List, Dict, Tuple
 import re
+from backend_geometry import sample_points_for_search
 
 class HistoricalQuizGenerator:
     def __init__(self, gmaps_client):
@@ -26,9 +27,8 @@ class HistoricalQuizGenerator:
             print(f"警告: route_coordsの形式が不正です: {type(route_coords[0])}")
             return []
         
-        # ルートを等間隔でサンプリング
-        step = max(1, len(route_coords) // num_points)
-        sample_points = route_coords[::step]
+        # ルートを道のり一定間隔でサンプリング（バックエンドと共通の処理）
+        sample_points = sample_points_for_search(route_coords, 3000, max_points=num_points)
         
         # 各ポイント周辺の歴史的スポットを検索
         search_types = [
@@ -1,6 +1,6 @@
 # utils.py
 import folium
-import polyline
+from backend_geometry import decode_polyline
 
 def create_route_map(route_data, origin_coords, dest_coords):
     """ルートを含む地図を作成"""
@@ -16,7 +16,7 @@ def create_route_map(route_data, origin_coords, dest_coords):
     )
     
     # ルートを描画
-    route_coords = polyline.decode(route_data['overview_polyline'])
+    route_coords = decode_polyline(route_data['overview_polyline']).tolist()
     folium.PolyLine(
         route_coords,
         color='blue',